@@ -1,5 +1,6 @@
 import os
-from flask import Flask, request, render_template, send_file, jsonify, send_from_directory
+from flask import Flask, Request, Response, request, render_template, send_file, jsonify, send_from_directory, stream_with_context, redirect, url_for
+from werkzeug.middleware.proxy_fix import ProxyFix
 from werkzeug.utils import secure_filename
 import PyPDF2
 import uuid
@@ -12,10 +13,35 @@ import logging
 import traceback
 import sys
 import threading
+import contextlib
+import collections
+import hashlib
+import json
+import sqlite3
+import multiprocessing
+import mmap
+import tempfile
+import shutil
+import random
+import itertools
+import socket
+import ssl
+import aiohttp
+import certifi
+from xml.sax.saxutils import escape
+# Private helpers of edge-tts, keep it pinned in requirements.txt (tests/test_edge_tts.py
+# runs the edge backend against a local stand-in)
+from edge_tts.communicate import (calc_max_mesg_size, connect_id, date_to_string, get_headers_and_data,
+                                  mkssml, remove_incompatible_characters, split_text_by_byte_length,
+                                  ssml_headers_plus_data)
+from edge_tts.constants import WSS_URL
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
-# Configure logging
+# Configure logging. DEBUG logs every page and chunk and is meant for
+# development only
 logging.basicConfig(
-    level=logging.DEBUG,
+    level=getattr(logging, os.environ.get('LOG_LEVEL', 'INFO').upper(), logging.INFO),
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
         logging.StreamHandler(sys.stdout)
@@ -23,11 +49,144 @@ logging.basicConfig(
 )
 logger = logging.getLogger('pdftovoice')
 
+class HashingStream:
+    """File-like wrapper that computes the SHA-256 of everything written to it."""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.sha256 = hashlib.sha256()
+
+    def write(self, data):
+        self.sha256.update(data)
+        return self.raw.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+class UploadRequest(Request):
+    """Request that keeps small uploads in memory and spills large ones to disk.
+
+    Uploads at or below UPLOAD_SPOOL_BYTES are read into a BytesIO. Larger
+    uploads (or uploads of unknown size) are written to a uniquely named
+    temporary file in UPLOAD_FOLDER, which the PDF reader and extraction
+    workers can open by path. The file is deleted when the request closes it.
+    MAX_CONTENT_LENGTH is enforced by Werkzeug while the body is read, and the
+    content hash is computed as the data arrives.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        spool_bytes = app.config['UPLOAD_SPOOL_BYTES']
+        if total_content_length is not None and total_content_length <= spool_bytes:
+            return HashingStream(io.BytesIO())
+        return HashingStream(tempfile.NamedTemporaryFile(
+            dir=app.config['UPLOAD_FOLDER'], prefix='upload-', suffix='.pdf'))
+
 app = Flask(__name__)
+app.request_class = UploadRequest
 app.config['UPLOAD_FOLDER'] = '/tmp/uploads'
 app.config['AUDIO_FOLDER'] = '/tmp/audio'
 app.config['STATIC_FOLDER'] = 'static'
-app.config['DEBUG'] = True  # Enable debug mode
+app.config['DEBUG'] = os.environ.get('FLASK_DEBUG', '0') == '1'
+
+# Upload handling (sizes in bytes)
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_UPLOAD_BYTES', 100 * 1024**2))
+app.config['UPLOAD_SPOOL_BYTES'] = int(os.environ.get('UPLOAD_SPOOL_BYTES', 4 * 1024**2))
+app.config['TEXT_CACHE_MAX_BYTES'] = int(os.environ.get('TEXT_CACHE_MAX_BYTES', 256 * 1024**2))
+
+# Speech synthesis settings
+app.config['TTS_RATE'] = '+25%'
+app.config['TTS_CHUNK_CHARS'] = int(os.environ.get('TTS_CHUNK_CHARS', 3000))
+app.config['TTS_CONCURRENCY'] = int(os.environ.get('TTS_CONCURRENCY', 4))
+app.config['TTS_CHUNK_RETRIES'] = int(os.environ.get('TTS_CHUNK_RETRIES', 2))
+app.config['TTS_CHUNK_TIMEOUT'] = int(os.environ.get('TTS_CHUNK_TIMEOUT', 60))
+
+# TTS backends, in order of preference: chunks fail over to the next backend
+# once every attempt on the previous one has failed. Each backend has its own
+# limit of concurrent requests (TTS_<NAME>_CONCURRENCY)
+app.config['TTS_BACKENDS'] = os.environ.get('TTS_BACKENDS', 'edge')
+app.config['TTS_EDGE_CONCURRENCY'] = int(os.environ.get('TTS_EDGE_CONCURRENCY', 8))
+app.config['TTS_ESPEAK_CONCURRENCY'] = int(os.environ.get('TTS_ESPEAK_CONCURRENCY', os.cpu_count() or 1))
+app.config['TTS_FAKE_CONCURRENCY'] = int(os.environ.get('TTS_FAKE_CONCURRENCY', 64))
+app.config['TTS_FAKE_LATENCY'] = float(os.environ.get('TTS_FAKE_LATENCY', 0.2))
+
+# Retries wait a random delay of up to TTS_BACKOFF_BASE * 2**(attempt-1)
+# seconds, capped at TTS_BACKOFF_MAX. After TTS_BREAKER_FAILURES consecutive
+# failures a backend is skipped for TTS_BREAKER_RESET seconds
+app.config['TTS_BACKOFF_BASE'] = float(os.environ.get('TTS_BACKOFF_BASE', 0.5))
+app.config['TTS_BACKOFF_MAX'] = float(os.environ.get('TTS_BACKOFF_MAX', 8))
+app.config['TTS_BREAKER_FAILURES'] = int(os.environ.get('TTS_BREAKER_FAILURES', 5))
+app.config['TTS_BREAKER_RESET'] = float(os.environ.get('TTS_BREAKER_RESET', 30))
+
+# Edge upstream: requests are paced to EDGE_TTS_RATE_LIMIT per second (bursts
+# of EDGE_TTS_BURST, 0 disables pacing) and the pace halves whenever the
+# service throttles us. Requests that would wait more than EDGE_TTS_MAX_WAIT
+# seconds for their turn are shed instead. EDGE_TTS_WSS_URL can point at a
+# local stand-in (see benchmarks/edge_standin.py)
+app.config['EDGE_TTS_WSS_URL'] = os.environ.get('EDGE_TTS_WSS_URL', WSS_URL)
+app.config['EDGE_TTS_RATE_LIMIT'] = float(os.environ.get('EDGE_TTS_RATE_LIMIT', 10))
+app.config['EDGE_TTS_BURST'] = int(os.environ.get('EDGE_TTS_BURST', 10))
+app.config['EDGE_TTS_MAX_WAIT'] = float(os.environ.get('EDGE_TTS_MAX_WAIT', 30))
+
+# Audio cache settings (sizes in bytes)
+app.config['AUDIO_CACHE_MAX_BYTES'] = int(os.environ.get('AUDIO_CACHE_MAX_BYTES', 2 * 1024**3))
+app.config['SEGMENT_CACHE_MAX_BYTES'] = int(os.environ.get('SEGMENT_CACHE_MAX_BYTES', 1024**3))
+
+# Output formats: 'mp3' is the upstream MP3 as is, 'opus' is transcoded to
+# Ogg Opus while it is synthesized (needs ffmpeg with libopus) at OPUS_BITRATE
+# kbit/s unless the request picks another of OPUS_BITRATES, and 'hls' is the
+# MP3 cut into HLS_SEGMENT_SECONDS segments with an m3u8 playlist
+app.config['DEFAULT_OUTPUT_FORMAT'] = os.environ.get('DEFAULT_OUTPUT_FORMAT', 'mp3')
+app.config['OPUS_BITRATE'] = int(os.environ.get('OPUS_BITRATE', 24))
+app.config['OPUS_BITRATES'] = (12, 16, 24, 32, 48, 64)
+app.config['HLS_SEGMENT_SECONDS'] = float(os.environ.get('HLS_SEGMENT_SECONDS', 6))
+
+# Sectioned conversions (POST /convert with sections=1) produce one audio file
+# per top-level bookmark of the PDF, or per SECTION_PAGES pages without them
+app.config['SECTION_PAGES'] = int(os.environ.get('SECTION_PAGES', 10))
+
+# Background job scheduling
+app.config['SCHEDULER_WORKERS'] = int(os.environ.get('SCHEDULER_WORKERS', 4))
+app.config['SCHEDULER_MAX_QUEUE'] = int(os.environ.get('SCHEDULER_MAX_QUEUE', 100))
+# Jobs one client may have waiting, so that a single client cannot fill the queue
+app.config['SCHEDULER_MAX_PER_CLIENT'] = int(os.environ.get('SCHEDULER_MAX_PER_CLIENT', 20))
+# Reverse proxies in front of the app whose X-Forwarded-For entry is trusted.
+# With the default of 0 the header is ignored, so that clients cannot choose
+# the identity they are scheduled under
+app.config['TRUSTED_PROXIES'] = int(os.environ.get('TRUSTED_PROXIES', 0))
+if app.config['TRUSTED_PROXIES']:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['TRUSTED_PROXIES'])
+
+# Job status storage: 'sqlite' is shared between worker processes and survives
+# restarts, 'memory' is per-process and meant for single-process development
+app.config['JOB_STORE'] = os.environ.get('JOB_STORE', 'sqlite')
+app.config['JOB_DB_PATH'] = os.environ.get('JOB_DB_PATH', os.path.join(app.config['AUDIO_FOLDER'], 'jobs.sqlite3'))
+app.config['JOB_TTL'] = int(os.environ.get('JOB_TTL', 7 * 24 * 3600))
+# Each process refreshes the records of the jobs it holds every JOB_HEARTBEAT
+# seconds; queued or processing records of other processes that were not
+# refreshed for JOB_STALE_SECONDS are taken to belong to a process that died
+app.config['JOB_HEARTBEAT'] = float(os.environ.get('JOB_HEARTBEAT', 30))
+app.config['JOB_STALE_SECONDS'] = float(os.environ.get('JOB_STALE_SECONDS', 120))
+
+# Disk lifecycle: the reaper runs every REAPER_INTERVAL seconds, removes audio
+# and cached text not accessed for AUDIO_TTL seconds, keeps AUDIO_FOLDER under
+# AUDIO_QUOTA_BYTES (least recently used first) and deletes leftovers of
+# crashed jobs once they are ORPHAN_GRACE seconds old
+app.config['REAPER_INTERVAL'] = int(os.environ.get('REAPER_INTERVAL', 300))
+app.config['AUDIO_TTL'] = int(os.environ.get('AUDIO_TTL', 7 * 24 * 3600))
+app.config['AUDIO_QUOTA_BYTES'] = int(os.environ.get('AUDIO_QUOTA_BYTES', 5 * 1024**3))
+app.config['ORPHAN_GRACE'] = int(os.environ.get('ORPHAN_GRACE', 3600))
+
+# PDF text extraction: documents with at least EXTRACT_PARALLEL_MIN_PAGES pages
+# are split into batches of EXTRACT_BATCH_PAGES pages and extracted by a pool of
+# EXTRACT_WORKERS processes (1 disables the pool)
+app.config['EXTRACT_WORKERS'] = int(os.environ.get('EXTRACT_WORKERS', min(4, os.cpu_count() or 1)))
+app.config['EXTRACT_PARALLEL_MIN_PAGES'] = int(os.environ.get('EXTRACT_PARALLEL_MIN_PAGES', 32))
+app.config['EXTRACT_BATCH_PAGES'] = int(os.environ.get('EXTRACT_BATCH_PAGES', 8))
+
+# Server-Sent Events: how often to re-read jobs updated by other processes,
+# and how long one event stream may stay open before the browser reconnects
+app.config['SSE_POLL_INTERVAL'] = float(os.environ.get('SSE_POLL_INTERVAL', 0.5))
+app.config['SSE_MAX_SECONDS'] = int(os.environ.get('SSE_MAX_SECONDS', 300))
 
 # Create directories if they don't exist
 try:
@@ -59,9 +218,1076 @@ VOICE_MAPPING = {
     'zh-CN': 'zh-CN-YunxiNeural'
 }
 
+# Boundaries used when splitting text into synthesis chunks
+PARAGRAPH_BREAK_RE = re.compile(r'\n\s*\n')
+SENTENCE_BREAK_RE = re.compile(r'(?<=[.!?\u2026])\s+')
+
+# Metrics, exposed in the Prometheus text format at /metrics. Values are per
+# process: under gunicorn each worker reports its own.
+METRICS = []
+
+class Metric:
+    """A metric with optional labels.
+
+    Values are either recorded by the code (inc/set/observe) or, when
+    `function` is given, read from it at scrape time. The function returns a
+    value, or a dict mapping tuples of label values to values.
+    """
+
+    type = None
+
+    def __init__(self, name, documentation, labelnames=(), function=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.function = function
+        self._values = {}
+        self._lock = threading.Lock()
+        METRICS.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def values(self):
+        if self.function is None:
+            with self._lock:
+                return dict(self._values)
+        values = self.function()
+        return values if isinstance(values, dict) else {(): values}
+
+    def samples(self):
+        """Yield (name suffix, labels, value) for the exposition."""
+        for key, value in sorted(self.values().items()):
+            yield '', dict(zip(self.labelnames, key)), value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        for suffix, labels, value in self.samples():
+            value = str(value) if isinstance(value, int) else repr(float(value))
+            if labels:
+                label_text = ','.join(f'{k}="{_escape_label(v)}"' for k, v in labels.items())
+                lines.append(f"{self.name}{suffix}{{{label_text}}} {value}")
+            else:
+                lines.append(f"{self.name}{suffix} {value}")
+        return '\n'.join(lines)
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(Metric):
+    type = 'gauge'
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=(0.01, 0.1, 1, 10)):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    def samples(self):
+        with self._lock:
+            values = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+        for key, (counts, total) in sorted(values.items()):
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield '_bucket', dict(labels, le='+Inf' if bound == float('inf') else f"{bound:g}"), cumulative
+            yield '_sum', labels, total
+            yield '_count', labels, cumulative
+
+def render_metrics():
+    return '\n'.join(metric.render() for metric in METRICS) + '\n'
+
+@contextlib.contextmanager
+def span(name, job_id=None):
+    """Time a block of work, recording it in pdftovoice_span_seconds."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        SPAN_SECONDS.observe(elapsed, span=name)
+        logger.debug("span %s job=%s %.3fs", name, job_id, elapsed)
+
+EXTRACT_PAGE_SECONDS = Histogram(
+    'pdftovoice_extract_page_seconds', 'Time to extract the text of one PDF page',
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5))
+TTS_FIRST_BYTE_SECONDS = Histogram(
+    'pdftovoice_tts_first_byte_seconds', 'Time from sending a chunk to the TTS backend to its first audio byte',
+    ['backend'], buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30))
+TTS_REQUEST_SECONDS = Histogram(
+    'pdftovoice_tts_request_seconds', 'Time to synthesize one chunk on a TTS backend',
+    ['backend'], buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60))
+TTS_CHARS = Counter('pdftovoice_tts_chars_total', 'Characters synthesized', ['backend'])
+TTS_BYTES = Counter('pdftovoice_tts_audio_bytes_total', 'MP3 bytes received from TTS backends', ['backend'])
+TTS_FAILURES = Counter('pdftovoice_tts_failures_total', 'Failed TTS requests', ['backend'])
+JOB_CHARS_PER_SECOND = Histogram(
+    'pdftovoice_job_chars_per_second', 'Synthesis throughput of finished audio jobs, in characters per second',
+    buckets=(10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000))
+JOB_BYTES_PER_SECOND = Histogram(
+    'pdftovoice_job_audio_bytes_per_second', 'Audio output rate of finished audio jobs, in bytes per second',
+    buckets=(1e3, 2.5e3, 5e3, 1e4, 2.5e4, 5e4, 1e5, 2.5e5, 5e5, 1e6))
+JOBS_FINISHED = Counter('pdftovoice_jobs_total', 'Finished audio jobs', ['status'])
+SPAN_SECONDS = Histogram(
+    'pdftovoice_span_seconds', 'Duration of instrumented operations', ['span'],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600))
+
+class JobStore:
+    """Storage for the status of background jobs.
+
+    A job record is a dict with 'status' ('queued'|'processing'|'completed'|
+    'failed'), 'error', a 'progress' dict, the 'owner' (see process_owner)
+    of the process running it and the timestamps 'created_at', 'started_at',
+    'finished_at' and 'updated_at'. Records expire JOB_TTL seconds after
+    their last update.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._changed = threading.Condition()
+
+    def _notify(self):
+        with self._changed:
+            self._changed.notify_all()
+
+    def wait_for_change(self, timeout):
+        """Block until a job is updated in this process, or until timeout.
+
+        Updates made by other processes are not signalled, so callers should
+        re-read the job after a short timeout either way.
+        """
+        with self._changed:
+            self._changed.wait(timeout)
+
+    def _record(self, status, fields):
+        now = time.time()
+        job = {'status': status, 'error': None, 'progress': {}, 'owner': None, 'created_at': now,
+               'started_at': None, 'finished_at': None, 'updated_at': now}
+        job.update(fields)
+        return job
+
+    def create(self, job_id, status='queued', **fields):
+        """Create the job record, replacing any earlier record of the job."""
+        raise NotImplementedError
+
+    def claim(self, job_id, **fields):
+        """Create a queued record unless the job is already queued or processing.
+
+        The check and the write are one atomic step, so of several requests
+        for the same job exactly one gets to run it. Finished and expired
+        records are replaced. Returns whether the record was created.
+        """
+        raise NotImplementedError
+
+    def update(self, job_id, **fields):
+        raise NotImplementedError
+
+    def get(self, job_id):
+        """Return the job record, or None if it does not exist or has expired."""
+        raise NotImplementedError
+
+    def delete(self, job_id):
+        raise NotImplementedError
+
+    def touch(self, job_ids):
+        """Refresh updated_at of the given jobs, as a heartbeat."""
+        raise NotImplementedError
+
+    def unfinished(self):
+        """Return {job_id: record} of all queued and processing jobs."""
+        raise NotImplementedError
+
+    def expire(self):
+        """Remove expired records and return them as {job_id: record}."""
+        raise NotImplementedError
+
+class MemoryJobStore(JobStore):
+    """Per-process job store, for development and single-worker deployments."""
+
+    def __init__(self, ttl):
+        super().__init__(ttl)
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def create(self, job_id, status='queued', **fields):
+        job = self._record(status, fields)
+        with self._lock:
+            self._jobs[job_id] = job
+        self._notify()
+
+    def claim(self, job_id, **fields):
+        job = self._record('queued', fields)
+        with self._lock:
+            current = self._jobs.get(job_id)
+            if (current is not None and current['status'] in ('queued', 'processing')
+                    and current['updated_at'] + self.ttl >= job['created_at']):
+                return False
+            self._jobs[job_id] = job
+        self._notify()
+        return True
+
+    def update(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.update(fields)
+            job['updated_at'] = time.time()
+        self._notify()
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job['updated_at'] + self.ttl < time.time():
+                return None
+            return dict(job, progress=dict(job['progress']))
+
+    def delete(self, job_id):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def touch(self, job_ids):
+        now = time.time()
+        with self._lock:
+            for job_id in job_ids:
+                if job_id in self._jobs:
+                    self._jobs[job_id]['updated_at'] = now
+
+    def unfinished(self):
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            return {job_id: dict(job, progress=dict(job['progress'])) for job_id, job in self._jobs.items()
+                    if job['status'] in ('queued', 'processing') and job['updated_at'] >= cutoff}
+
+    def expire(self):
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            expired = {job_id: job for job_id, job in self._jobs.items() if job['updated_at'] < cutoff}
+            for job_id in expired:
+                del self._jobs[job_id]
+        return expired
+
+class SQLiteJobStore(JobStore):
+    """Job store in a SQLite database in WAL mode, shared by all worker processes.
+
+    Each thread gets its own connection. Lookups are a single primary-key read.
+    """
+
+    COLUMNS = ('status', 'error', 'progress', 'owner', 'created_at', 'started_at', 'finished_at', 'updated_at')
+
+    def __init__(self, path, ttl):
+        super().__init__(ttl)
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    error TEXT,
+                    progress TEXT NOT NULL DEFAULT '{}',
+                    owner TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if 'owner' not in columns:
+                # Databases created before jobs had an owner
+                conn.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_updated_at ON jobs (updated_at)")
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def create(self, job_id, status='queued', **fields):
+        job = self._record(status, fields)
+        job['progress'] = json.dumps(job['progress'])
+        with self._connect() as conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO jobs (job_id, {', '.join(self.COLUMNS)}) "
+                f"VALUES (?, {', '.join('?' for _ in self.COLUMNS)})",
+                (job_id, *(job[c] for c in self.COLUMNS)))
+        self._notify()
+
+    def claim(self, job_id, **fields):
+        job = self._record('queued', fields)
+        job['progress'] = json.dumps(job['progress'])
+        with self._connect() as conn:
+            # The conditional upsert is a single statement, so it cannot
+            # interleave with a concurrent claim from another thread or process
+            cursor = conn.execute(
+                f"INSERT INTO jobs (job_id, {', '.join(self.COLUMNS)}) "
+                f"VALUES (?, {', '.join('?' for _ in self.COLUMNS)}) "
+                f"ON CONFLICT (job_id) DO UPDATE SET "
+                f"{', '.join(f'{c} = excluded.{c}' for c in self.COLUMNS)} "
+                f"WHERE jobs.status NOT IN ('queued', 'processing') OR jobs.updated_at < ?",
+                (job_id, *(job[c] for c in self.COLUMNS), job['created_at'] - self.ttl))
+        if cursor.rowcount == 0:
+            return False
+        self._notify()
+        return True
+
+    def update(self, job_id, **fields):
+        fields['updated_at'] = time.time()
+        if 'progress' in fields:
+            fields['progress'] = json.dumps(fields['progress'])
+        assignments = ', '.join(f"{column} = ?" for column in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE job_id = ?", (*fields.values(), job_id))
+        self._notify()
+
+    def get(self, job_id):
+        row = self._connect().execute(
+            f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE job_id = ? AND updated_at >= ?",
+            (job_id, time.time() - self.ttl)).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(self.COLUMNS, row))
+        job['progress'] = json.loads(job['progress'])
+        return job
+
+    def delete(self, job_id):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+
+    def touch(self, job_ids):
+        if not job_ids:
+            return
+        with self._connect() as conn:
+            conn.executemany("UPDATE jobs SET updated_at = ? WHERE job_id = ?",
+                             [(time.time(), job_id) for job_id in job_ids])
+
+    def unfinished(self):
+        rows = self._connect().execute(
+            f"SELECT job_id, {', '.join(self.COLUMNS)} FROM jobs "
+            f"WHERE status IN ('queued', 'processing') AND updated_at >= ?",
+            (time.time() - self.ttl,)).fetchall()
+        jobs = {}
+        for job_id, *values in rows:
+            job = dict(zip(self.COLUMNS, values))
+            job['progress'] = json.loads(job['progress'])
+            jobs[job_id] = job
+        return jobs
+
+    def expire(self):
+        cutoff = time.time() - self.ttl
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT job_id, {', '.join(self.COLUMNS)} FROM jobs WHERE updated_at < ?",
+                                (cutoff,)).fetchall()
+            conn.execute("DELETE FROM jobs WHERE updated_at < ?", (cutoff,))
+        expired = {}
+        for job_id, *values in rows:
+            job = dict(zip(self.COLUMNS, values))
+            job['progress'] = json.loads(job['progress'])
+            expired[job_id] = job
+        return expired
+
+def create_job_store():
+    """Build the job store selected by the JOB_STORE setting."""
+    if app.config['JOB_STORE'] == 'memory':
+        return MemoryJobStore(app.config['JOB_TTL'])
+    try:
+        return SQLiteJobStore(app.config['JOB_DB_PATH'], app.config['JOB_TTL'])
+    except sqlite3.Error as e:
+        logger.error(f"Could not open job database {app.config['JOB_DB_PATH']}, "
+                     f"falling back to in-memory job store: {e}")
+        return MemoryJobStore(app.config['JOB_TTL'])
+
 # Status tracking for audio generation jobs
-# Keys are audio_ids, values are {'status': 'processing'|'completed'|'failed', 'error': error_message}
-JOB_STATUS = {}
+job_store = create_job_store()
+
+_owner = {'pid': None, 'id': None}
+
+def process_owner():
+    """Identify this process in job records: '<host>:<pid>:<token>'.
+
+    The token tells a restarted process apart from an earlier one that had
+    the same pid. It is regenerated after a fork.
+    """
+    if _owner['pid'] != os.getpid():
+        _owner['pid'] = os.getpid()
+        _owner['id'] = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    return _owner['id']
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def job_is_running(job_id, job):
+    """Whether a queued or processing job is still held by a live process.
+
+    Jobs of this process are checked against the scheduler. All others need
+    a fresh heartbeat; for jobs of another process on this host that process
+    must also still exist, which catches a crash before the heartbeat goes
+    stale. The pid alone is not enough, as pids are reused (in containers
+    a restarted worker often gets the pid of the one it replaced).
+    """
+    if job['status'] not in ('queued', 'processing'):
+        return False
+    owner = job.get('owner')
+    if owner == process_owner():
+        return scheduler.holds(job_id)
+    if time.time() - job['updated_at'] >= app.config['JOB_STALE_SECONDS']:
+        return False
+    host, _, rest = (owner or '').partition(':')
+    pid = rest.split(':', 1)[0]
+    if host == socket.gethostname() and pid.isdigit():
+        return int(pid) != os.getpid() and _pid_alive(int(pid))
+    return True
+
+def fail_stale_job(job_id, now=None):
+    job_store.update(job_id, status='failed', finished_at=now or time.time(),
+                     error='Job was interrupted, please try again')
+    logger.warning(f"Marked interrupted job {job_id} as failed")
+
+def fail_stale_jobs():
+    """Mark queued and processing jobs whose process is gone as failed. Returns how many."""
+    now = time.time()
+    failed = 0
+    for job_id, job in job_store.unfinished().items():
+        # Batch records only summarize their documents' jobs
+        if job_id.startswith('batch-') or job_is_running(job_id, job):
+            continue
+        fail_stale_job(job_id, now)
+        failed += 1
+    return failed
+
+def cache_key(text, voice, rate, output='mp3'):
+    """Content address for synthesized audio: hash of normalized text, voice, rate and output profile."""
+    normalized = ' '.join(text.split())
+    digest = hashlib.sha256()
+    digest.update(f"{voice}\0{rate}\0".encode('utf-8'))
+    if output != 'mp3':
+        # Left out for MP3 so that audio ids from before output profiles stay valid
+        digest.update(f"{output}\0".encode('utf-8'))
+    digest.update(normalized.encode('utf-8'))
+    return digest.hexdigest()
+
+class DiskCache:
+    """Size-bounded, content-addressed file cache with LRU eviction.
+
+    Entries are stored as <key><suffix> in a directory. The LRU order is kept
+    in memory and seeded from file modification times, which are bumped on
+    every hit so that the order survives restarts and is shared (roughly)
+    between worker processes.
+    """
+
+    def __init__(self, directory, max_bytes, suffix='.mp3'):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = None  # key -> size, least recently used first
+        self._lock = threading.Lock()
+
+    def path_for(self, key):
+        return os.path.join(self.directory, key + self.suffix)
+
+    def _load(self):
+        if self._entries is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        found = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(self.suffix):
+                stat = entry.stat()
+                found.append((stat.st_mtime, entry.name[:-len(self.suffix)], stat.st_size))
+        found.sort()
+        self._entries = collections.OrderedDict((key, size) for _, key, size in found)
+
+    def get(self, key):
+        """Return the path of a cached entry and mark it as recently used, or None."""
+        path = self.touch(key)
+        with self._lock:
+            if path is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return path
+
+    def touch(self, key):
+        """Mark an entry as recently used without counting a lookup."""
+        path = self.path_for(key)
+        with self._lock:
+            self._load()
+            try:
+                os.utime(path)
+                size = os.path.getsize(path)
+            except OSError:
+                self._entries.pop(key, None)
+                return None
+            self._entries[key] = size
+            self._entries.move_to_end(key)
+            return path
+
+    def get_bytes(self, key):
+        path = self.get(key)
+        if path is None:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put_bytes(self, key, data):
+        """Atomically store data under key."""
+        path = self.path_for(key)
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self.add(key)
+        return path
+
+    def writer(self, key):
+        """Start writing an entry in pieces, see CacheEntryWriter."""
+        return CacheEntryWriter(self, key)
+
+    def add(self, key):
+        """Register a file that was written to path_for(key) and enforce the size bound."""
+        try:
+            size = os.path.getsize(self.path_for(key))
+        except OSError:
+            return
+        with self._lock:
+            self._load()
+            self._entries[key] = size
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def forget(self, key):
+        """Drop an entry from the index after its file was removed elsewhere."""
+        with self._lock:
+            if self._entries is not None:
+                self._entries.pop(key, None)
+
+    def _evict(self):
+        total = sum(self._entries.values())
+        while total > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            total -= size
+            try:
+                os.remove(self.path_for(key))
+                self.evictions += 1
+            except OSError:
+                pass
+            logger.debug("Evicted %s from cache %s", key, self.directory)
+
+    def stats(self):
+        with self._lock:
+            self._load()
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': sum(self._entries.values()),
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+            }
+
+class CacheEntryWriter:
+    """A DiskCache entry written in pieces to a temporary file.
+
+    commit() moves the file into place and registers it, discard() drops it;
+    until then readers of the cache do not see the entry.
+    """
+
+    def __init__(self, cache, key):
+        self.cache = cache
+        self.key = key
+        os.makedirs(cache.directory, exist_ok=True)
+        self.tmp_path = f"{cache.path_for(key)}.{uuid.uuid4().hex}.tmp"
+        self._file = open(self.tmp_path, 'wb')
+
+    def write(self, data):
+        self._file.write(data)
+
+    def commit(self):
+        self._file.close()
+        os.replace(self.tmp_path, self.cache.path_for(self.key))
+        self.cache.add(self.key)
+
+    def discard(self):
+        self._file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+class QueueFullError(Exception):
+    """Raised when the job queue cannot take more work."""
+
+class JobScheduler:
+    """Run background jobs on one long-lived asyncio loop with a fixed worker pool.
+
+    Jobs wait in a bounded queue and are handed to workers round-robin across
+    clients, so one client submitting many documents cannot starve others.
+    Each client may have at most max_per_client jobs waiting. Deferred jobs
+    (the documents of a batch) beyond that wait in a backlog of their client
+    instead of being rejected, and move into the queue as the client's
+    earlier jobs are taken by workers.
+    The loop thread is started on first use, which keeps it out of processes
+    that never schedule work (and makes it fork-safe under gunicorn).
+    """
+
+    def __init__(self, workers, max_queue, max_per_client=None):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.max_per_client = max_per_client or max_queue
+        self.active = 0
+        self.completed = 0
+        self.rejected = 0
+        self._queues = collections.OrderedDict()  # client_id -> deque of (job_id, factory)
+        self._queued = 0
+        self._backlog = collections.OrderedDict()  # client_id -> deque of deferred (job_id, factory)
+        self._deferred = 0
+        self._running = set()  # job ids being processed
+        self._lock = threading.Lock()
+        self._loop = None
+        self._ready = None
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            started = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                self._ready = asyncio.Semaphore(0)
+                for n in range(self.workers):
+                    loop.create_task(self._worker(n))
+                loop.create_task(self._heartbeat())
+                started.set()
+                loop.run_forever()
+
+            thread = threading.Thread(target=run, name='job-scheduler', daemon=True)
+            thread.start()
+            started.wait()
+            self._loop = loop
+            logger.info(f"Job scheduler started with {self.workers} workers")
+
+    def submit(self, job_id, coro_factory, client_id='anonymous', defer=False):
+        """Queue coro_factory() to run on the scheduler loop.
+
+        With defer, a job that does not fit in the queue waits in the backlog
+        of its client instead of being rejected.
+
+        Returns:
+            int: 1-based position of the job in the queue
+
+        Raises:
+            QueueFullError: If the queue already holds max_queue jobs, or the
+                client max_per_client
+        """
+        self._ensure_started()
+        with self._lock:
+            # Deferred jobs keep their order behind those already in the backlog
+            if (defer and client_id in self._backlog) or not self._has_room_locked(client_id):
+                if not defer:
+                    self.rejected += 1
+                    if self._queued >= self.max_queue:
+                        raise QueueFullError(f"Job queue is full ({self._queued} jobs waiting)")
+                    raise QueueFullError(f"Too many jobs waiting for this client ({self.max_per_client})")
+                self._backlog.setdefault(client_id, collections.deque()).append((job_id, coro_factory))
+                self._deferred += 1
+                return self._position_locked(job_id)
+            self._queues.setdefault(client_id, collections.deque()).append((job_id, coro_factory))
+            self._queued += 1
+            position = self._position_locked(job_id)
+        self._loop.call_soon_threadsafe(self._ready.release)
+        return position
+
+    def position(self, job_id):
+        """Return the 1-based queue position of a waiting job, or None."""
+        with self._lock:
+            return self._position_locked(job_id)
+
+    def holds(self, job_id):
+        """Whether a job is waiting in this scheduler's queue or being processed by it."""
+        with self._lock:
+            return job_id in self._running or self._position_locked(job_id) is not None
+
+    def _held_locked(self):
+        waiting = list(self._queues.values()) + list(self._backlog.values())
+        return list(self._running) + [job_id for queue in waiting for job_id, _ in queue]
+
+    async def _heartbeat(self):
+        # Lets other processes tell the jobs of this one from those of a dead one
+        while True:
+            await asyncio.sleep(app.config['JOB_HEARTBEAT'])
+            with self._lock:
+                held = self._held_locked()
+            try:
+                job_store.touch(held)
+            except Exception as e:
+                logger.error(f"Job heartbeat failed: {str(e)}")
+
+    def _position_locked(self, job_id):
+        # Replay the round-robin order in which workers will take jobs; the
+        # backlog is approximated as following the queue
+        position = 0
+        for queues in (self._queues, self._backlog):
+            queues = [list(q) for q in queues.values()]
+            for depth in range(max((len(q) for q in queues), default=0)):
+                for q in queues:
+                    if depth < len(q):
+                        position += 1
+                        if q[depth][0] == job_id:
+                            return position
+        return None
+
+    def _has_room_locked(self, client_id):
+        return (self._queued < self.max_queue
+                and len(self._queues.get(client_id, ())) < self.max_per_client)
+
+    def _pop_next_locked(self):
+        client_id, queue = next(iter(self._queues.items()))
+        job = queue.popleft()
+        del self._queues[client_id]
+        if queue:
+            # Move the client to the back of the rotation
+            self._queues[client_id] = queue
+        self._queued -= 1
+        return job
+
+    def _admit_deferred_locked(self):
+        """Move backlogged jobs into the queue while there is room. Returns how many."""
+        admitted = 0
+        for client_id in list(self._backlog):
+            backlog = self._backlog[client_id]
+            while backlog and self._has_room_locked(client_id):
+                self._queues.setdefault(client_id, collections.deque()).append(backlog.popleft())
+                self._queued += 1
+                self._deferred -= 1
+                admitted += 1
+            if not backlog:
+                del self._backlog[client_id]
+        return admitted
+
+    async def _worker(self, n):
+        while True:
+            await self._ready.acquire()
+            with self._lock:
+                job_id, coro_factory = self._pop_next_locked()
+                self.active += 1
+                self._running.add(job_id)
+                admitted = self._admit_deferred_locked()
+            for _ in range(admitted):
+                self._ready.release()
+            try:
+                await coro_factory()
+            except Exception as e:
+                logger.error(f"Worker {n} failed on job {job_id}: {str(e)}", exc_info=True)
+            finally:
+                with self._lock:
+                    self.active -= 1
+                    self.completed += 1
+                    self._running.discard(job_id)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'active': self.active,
+                'queued': self._queued,
+                'deferred': self._deferred,
+                'max_queue': self.max_queue,
+                'max_per_client': self.max_per_client,
+                'completed': self.completed,
+                'rejected': self.rejected,
+            }
+
+scheduler = JobScheduler(app.config['SCHEDULER_WORKERS'], app.config['SCHEDULER_MAX_QUEUE'],
+                         app.config['SCHEDULER_MAX_PER_CLIENT'])
+
+class Reaper:
+    """Background thread that keeps the working directories from growing forever.
+
+    Each sweep expires old job records, fails queued and processing jobs
+    whose process is gone (see job_is_running), removes leftovers of crashed
+    jobs (partial .part files and HLS directories, legacy .processing/.error
+    markers, temporary files and persisted uploads with no running job),
+    deletes cached audio and text not accessed within AUDIO_TTL, and evicts
+    least recently accessed audio until AUDIO_FOLDER fits in
+    AUDIO_QUOTA_BYTES. Access time is the file modification time, which the
+    caches bump on every hit (for HLS output, that of the playlist).
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.sweeps = 0
+        self.files_removed = collections.Counter()  # reason -> count
+        self.bytes_reclaimed = collections.Counter()  # reason -> bytes
+        self.jobs_expired = 0
+        self.jobs_failed_stale = 0
+        self.last_sweep_at = None
+        self.last_sweep_seconds = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def ensure_started(self):
+        if self._thread is not None or self.interval <= 0:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='reaper', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"Reaper sweep failed: {str(e)}", exc_info=True)
+
+    def _remove(self, path, reason, size=None):
+        try:
+            if os.path.isdir(path):
+                size = directory_size(path) if size is None else size
+                shutil.rmtree(path)
+            else:
+                size = os.path.getsize(path) if size is None else size
+                os.remove(path)
+        except OSError:
+            return False
+        with self._lock:
+            self.files_removed[reason] += 1
+            self.bytes_reclaimed[reason] += size
+        return True
+
+    def sweep(self):
+        start = time.time()
+        expired = job_store.expire()
+        for job_id, job in expired.items():
+            if job['progress'].get('degraded'):
+                # Audio from a fallback backend is only kept for the job that made it
+                self._remove(output_sink_for(job_id, job).location(output_id_for(job_id, job)), 'degraded')
+        failed = fail_stale_jobs()
+        self._reap_orphans(start)
+        self._reap_cached(start)
+        with self._lock:
+            self.sweeps += 1
+            self.jobs_expired += len(expired)
+            self.jobs_failed_stale += failed
+            self.last_sweep_at = start
+            self.last_sweep_seconds = time.time() - start
+        logger.info(f"Reaper sweep done in {self.last_sweep_seconds:.2f}s, "
+                    f"{sum(self.bytes_reclaimed.values())} bytes reclaimed in total")
+
+    def _reap_orphans(self, now):
+        grace = app.config['ORPHAN_GRACE']
+        folders = [app.config['AUDIO_FOLDER'], segment_cache.directory,
+                   app.config['UPLOAD_FOLDER'], text_cache.directory, manifest_cache.directory]
+        for folder in folders:
+            try:
+                entries = list(os.scandir(folder))
+            except OSError:
+                continue
+            for entry in entries:
+                name = entry.name
+                if not entry.is_file():
+                    continue
+                try:
+                    mtime = entry.stat().st_mtime
+                except OSError:
+                    continue
+                if now - mtime < grace:
+                    continue
+
+                if name.endswith(('.processing', '.error', '.tmp')) or name.startswith('upload-'):
+                    self._remove(entry.path, 'orphan')
+                elif name.endswith('.part') or (folder == app.config['UPLOAD_FOLDER'] and name.endswith('.pdf')):
+                    if self._abandoned(name.split('.', 1)[0], now):
+                        self._remove(entry.path, 'orphan')
+
+    def _abandoned(self, job_id, now):
+        """Whether the job that writes a file is no longer running."""
+        job = job_store.get(job_id)
+        if job is None or job['status'] not in ('queued', 'processing'):
+            return True
+        if job_is_running(job_id, job):
+            return False
+        # Went stale since the job records were swept at the start of this sweep
+        fail_stale_job(job_id, now)
+        with self._lock:
+            self.jobs_failed_stale += 1
+        return True
+
+    def _reap_hls(self, now):
+        """Apply the TTL and orphan rules to HLS output directories.
+
+        Returns the directories that are kept, as candidates for quota eviction.
+        """
+        ttl = app.config['AUDIO_TTL']
+        kept = []
+        try:
+            entries = list(os.scandir(os.path.join(app.config['AUDIO_FOLDER'], 'hls')))
+        except OSError:
+            return kept
+        for entry in entries:
+            if not entry.is_dir():
+                continue
+            try:
+                mtime = os.stat(os.path.join(entry.path, HlsSink.PLAYLIST)).st_mtime
+            except OSError:
+                mtime = entry.stat().st_mtime
+            size = directory_size(entry.path)
+            if not HlsSink.complete(entry.path):
+                if now - mtime >= app.config['ORPHAN_GRACE'] and self._abandoned(entry.name, now):
+                    self._remove(entry.path, 'orphan', size)
+            elif now - mtime > ttl:
+                self._remove(entry.path, 'ttl', size)
+            else:
+                kept.append((mtime, size, entry.path, None, entry.name))
+        return kept
+
+    def _reap_cached(self, now):
+        ttl = app.config['AUDIO_TTL']
+        caches = [audio_cache, opus_cache, segment_cache, text_cache, manifest_cache]
+        audio_files = self._reap_hls(now)
+        for cache in caches:
+            try:
+                entries = list(os.scandir(cache.directory))
+            except OSError:
+                continue
+            for entry in entries:
+                if not entry.is_file() or not entry.name.endswith(cache.suffix):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                key = entry.name[:-len(cache.suffix)]
+                if now - stat.st_mtime > ttl:
+                    if self._remove(entry.path, 'ttl', stat.st_size):
+                        cache.forget(key)
+                elif cache not in (text_cache, manifest_cache):
+                    audio_files.append((stat.st_mtime, stat.st_size, entry.path, cache, key))
+
+        total = sum(size for _, size, _, _, _ in audio_files)
+        quota = app.config['AUDIO_QUOTA_BYTES']
+        if total <= quota:
+            return
+        audio_files.sort(key=lambda f: f[0])
+        for _, size, path, cache, key in audio_files:
+            if total <= quota:
+                break
+            if self._remove(path, 'quota', size):
+                if cache is not None:
+                    cache.forget(key)
+                total -= size
+
+    def stats(self):
+        with self._lock:
+            return {
+                'interval': self.interval,
+                'sweeps': self.sweeps,
+                'last_sweep_at': self.last_sweep_at,
+                'last_sweep_seconds': self.last_sweep_seconds,
+                'jobs_expired': self.jobs_expired,
+                'jobs_failed_stale': self.jobs_failed_stale,
+                'files_removed': dict(self.files_removed),
+                'bytes_reclaimed': dict(self.bytes_reclaimed),
+                'bytes_reclaimed_total': sum(self.bytes_reclaimed.values()),
+            }
+
+def client_id_for(req):
+    """Identify the client for fair scheduling.
+
+    remote_addr is the peer address, or the client address reported by the
+    trusted proxies when TRUSTED_PROXIES is set (see ProxyFix).
+    """
+    return req.remote_addr or 'anonymous'
+
+# Whole-document audio lives directly in AUDIO_FOLDER as <audio_id>.mp3 (or
+# .ogg for Opus, and AUDIO_FOLDER/hls/<audio_id>/ for HLS), where audio_id is
+# the cache key, so a repeat request maps onto the finished file.
+# Individual synthesis chunks are cached separately so that documents sharing
+# paragraphs reuse audio too.
+audio_cache = DiskCache(app.config['AUDIO_FOLDER'], app.config['AUDIO_CACHE_MAX_BYTES'])
+opus_cache = DiskCache(app.config['AUDIO_FOLDER'], app.config['AUDIO_CACHE_MAX_BYTES'], suffix='.ogg')
+segment_cache = DiskCache(os.path.join(app.config['AUDIO_FOLDER'], 'segments'),
+                          app.config['SEGMENT_CACHE_MAX_BYTES'])
+
+# Extracted text, stored per page as a JSON list and keyed by the SHA-256 of
+# the PDF. Bump EXTRACTION_VERSION whenever extraction or cleanup output changes.
+EXTRACTION_VERSION = 4
+text_cache = DiskCache(os.path.join(app.config['UPLOAD_FOLDER'], 'text-cache'),
+                       app.config['TEXT_CACHE_MAX_BYTES'], suffix='.json')
+
+# Manifests of sectioned conversions, keyed by the job's audio id. Each section
+# is stored as audio of its own, under the cache key of its text, so the
+# manifest is all a job needs to resume or to reuse unchanged sections.
+manifest_cache = DiskCache(os.path.join(app.config['AUDIO_FOLDER'], 'manifests'),
+                           app.config['TEXT_CACHE_MAX_BYTES'], suffix='.json')
+
+reaper = Reaper(app.config['REAPER_INTERVAL'])
+
+_reconciled = {'pid': None}
+
+@app.before_request
+def start_reaper():
+    # Started lazily so that each (forked) worker process runs its own
+    reaper.ensure_started()
+    if _reconciled['pid'] != os.getpid():
+        # Jobs that were queued or running when the previous process stopped
+        _reconciled['pid'] = os.getpid()
+        failed = fail_stale_jobs()
+        if failed:
+            logger.info(f"Marked {failed} jobs interrupted by a restart as failed")
 
 @app.route('/')
 def index():
@@ -91,35 +1317,148 @@ def extract_text():
         return jsonify({'error': 'No selected file'}), 400
     
     if file and file.filename.lower().endswith('.pdf'):
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-        logger.info(f"Saved file: {filepath}")
+        # Read straight from the upload: in memory for small files, from the
+        # spooled temporary file for large ones
+        source = pdf_source(file)
+        text_key = f"{pdf_digest(file)}-v{EXTRACTION_VERSION}"
+        logger.info(f"Received upload: {file.filename} ({text_key})")
+
+        cached_pages = load_cached_pages(text_key)
+
+        if request.args.get('stream') == '1':
+            return stream_extracted_pages(source, text_key, cached_pages)
         
         try:
             # Extract text from PDF
-            logger.info(f"Extracting text from PDF: {filepath}")
-            extracted_text = extract_text_from_pdf(filepath)
+            if cached_pages is not None:
+                pages = cached_pages
+            else:
+                with span('extract', text_key):
+                    pages = list(iter_pdf_pages(source))
+                text_cache.put_bytes(text_key, json.dumps(pages).encode('utf-8'))
+            extracted_text = "\n".join(page for page in pages if page)
             if not extracted_text:
-                logger.warning(f"Failed to extract text from PDF: {filepath}")
+                logger.warning(f"Failed to extract text from PDF: {file.filename}")
                 return jsonify({'error': 'Failed to extract text from PDF. The file might be encrypted or contain only images.'}), 400
             
-            # Clean up - delete the uploaded file
-            os.remove(filepath)
-            logger.info(f"Deleted file after processing: {filepath}")
-            
             return jsonify({'text': extracted_text})
         except Exception as e:
             logger.error(f"Error processing PDF: {str(e)}", exc_info=True)
-            # Clean up in case of error
-            if os.path.exists(filepath):
-                os.remove(filepath)
-                logger.info(f"Deleted file after error: {filepath}")
             return jsonify({'error': f'Error processing PDF: {str(e)}'}), 500
     else:
         logger.warning(f"Unsupported file type: {file.filename}")
         return jsonify({'error': 'Unsupported file type. Please upload a PDF file.'}), 400
 
+def pdf_source(file):
+    """Return what the PDF reader should open for an uploaded file.
+
+    That is the path of the spooled temporary file for large uploads, so that
+    extraction workers can open it too, or the in-memory stream otherwise.
+    """
+    stream = file.stream
+    if isinstance(stream, HashingStream):
+        stream = stream.raw
+    name = getattr(stream, 'name', None)
+    if isinstance(name, str) and os.path.exists(name):
+        stream.flush()
+        return name
+    stream.seek(0)
+    return stream
+
+def pdf_digest(file):
+    """SHA-256 of an uploaded file, computed while it was received when possible."""
+    if isinstance(file.stream, HashingStream):
+        return file.stream.sha256.hexdigest()
+    digest = hashlib.sha256()
+    file.stream.seek(0)
+    for block in iter(lambda: file.stream.read(1024 * 1024), b''):
+        digest.update(block)
+    file.stream.seek(0)
+    return digest.hexdigest()
+
+def load_cached_pages(text_key):
+    """Return the cached list of page texts for a PDF, or None."""
+    data = text_cache.get_bytes(text_key)
+    if data is None:
+        return None
+    try:
+        return json.loads(data)
+    except ValueError:
+        logger.warning(f"Discarding unreadable text cache entry {text_key}")
+        return None
+
+class CachedPagesWriter:
+    """Write the pages of a PDF to its text cache entry as they are extracted.
+
+    The entry is the same JSON list load_cached_pages reads, written one page
+    at a time so that the text of a document is never held in memory.
+    """
+
+    def __init__(self, text_key):
+        self.text_key = text_key
+        self._entry = text_cache.writer(text_key)
+        self._entry.write(b'[')
+        self._pages = 0
+
+    def add(self, page_text):
+        self._entry.write((b',' if self._pages else b'') + json.dumps(page_text).encode('utf-8'))
+        self._pages += 1
+
+    def commit(self):
+        """Store the entry. Failures are logged, as the cache is only an optimization."""
+        try:
+            self._entry.write(b']')
+            self._entry.commit()
+        except OSError as e:
+            logger.warning(f"Could not cache the text of {self.text_key}: {str(e)}")
+            self.discard()
+
+    def discard(self):
+        try:
+            self._entry.discard()
+        except OSError:
+            pass
+
+def stream_extracted_pages(source, text_key, cached_pages=None):
+    """Stream extracted pages as newline-delimited JSON.
+
+    Emits {"page": n, "text": ...} for every page as soon as it is extracted,
+    then {"done": true, "pages": n}, or {"error": ...} if extraction fails.
+    The upload stays open until the stream ends because the request context
+    is kept alive by stream_with_context. Pages come from the text cache when
+    the document has been seen before, and are added to it otherwise.
+    """
+    def lines():
+        page_count = 0
+        has_text = False
+        cache_writer = CachedPagesWriter(text_key) if cached_pages is None else None
+        try:
+            with span('extract', text_key):
+                for page_text in cached_pages if cached_pages is not None else iter_pdf_pages(source):
+                    page_count += 1
+                    has_text = has_text or bool(page_text)
+                    if cache_writer:
+                        cache_writer.add(page_text)
+                    yield json.dumps({'page': page_count, 'text': page_text}) + "\n"
+            if cache_writer:
+                cache_writer.commit()
+                cache_writer = None
+            if not has_text:
+                yield json.dumps({'error': 'Failed to extract text from PDF. The file might be encrypted or contain only images.'}) + "\n"
+            else:
+                yield json.dumps({'done': True, 'pages': page_count}) + "\n"
+        except Exception as e:
+            logger.error(f"Error processing PDF: {str(e)}", exc_info=True)
+            yield json.dumps({'error': f'Error processing PDF: {str(e)}'}) + "\n"
+        finally:
+            if cache_writer:
+                cache_writer.discard()
+
+    return Response(stream_with_context(lines()), mimetype='application/x-ndjson', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+
 @app.route('/generate-audio', methods=['POST'])
 def generate_audio():
     try:
@@ -139,34 +1478,31 @@ def generate_audio():
         
         # Get the appropriate voice for the language
         voice = VOICE_MAPPING.get(lang_code, 'en-US-ChristopherNeural')
-        logger.info(f"Using voice: {voice} for language: {lang_code}")
-        
-        # Generate unique ID for the audio file
-        audio_id = str(uuid.uuid4())
-        audio_filename = f"{audio_id}.mp3"
-        audio_path = os.path.join(app.config['AUDIO_FOLDER'], audio_filename)
-        logger.info(f"Audio will be saved to: {audio_path}")
+        logger.debug("Using voice: %s for language: %s", voice, lang_code)
+
+        try:
+            output = parse_output(data.get('format'), data.get('bitrate'))
+        except OutputFormatError as e:
+            logger.warning(f"Rejected output format: {str(e)}")
+            return jsonify({'error': str(e)}), 400
         
-        # Initialize status tracking
-        JOB_STATUS[audio_id] = {'status': 'processing', 'error': None}
+        # The audio ID is the content address of the request, so resubmitting
+        # the same text with the same voice and output format reuses the existing audio
+        audio_id = cache_key(text, voice, app.config['TTS_RATE'], output_tag(output))
+        existing = existing_audio_job(audio_id, output)
+        if existing:
+            return jsonify(existing)
+
+        audio_path = OUTPUT_SINKS[output['format']].location(audio_id)
+        logger.debug("Audio will be saved to: %s", audio_path)
         
-        # Start the TTS processing in a background thread
+        # Queue the TTS processing on the background scheduler
         # This allows us to return immediately while processing continues
-        thread = threading.Thread(
-            target=process_tts_in_background,
-            args=(text, voice, audio_path, audio_id)
+        return queue_audio_job(
+            audio_id,
+            lambda: process_tts_in_background(text, voice, audio_path, audio_id, output=output),
+            progress={'chars_total': len(text), 'format': output['format']}
         )
-        thread.daemon = True  # Daemon thread will be terminated when main thread exits
-        thread.start()
-        
-        # Return immediately with the audio_id
-        # Client will poll for status
-        logger.info(f"Started background TTS processing for {audio_id}")
-        return jsonify({
-            'audio_id': audio_id, 
-            'status': 'processing',
-            'message': 'Audio generation started in background'
-        })
             
     except Exception as e:
         # Catch-all for any unexpected errors
@@ -177,126 +1513,1753 @@ def generate_audio():
             'traceback': traceback.format_exc()
         }), 500
 
-def process_tts_in_background(text, voice, audio_path, audio_id):
-    """Process TTS in a background thread to avoid Vercel timeouts"""
+def existing_audio_job(audio_id, output, lookup=None):
+    """Return the response for an audio job that is cached or already running, or None.
+
+    lookup finds the finished output of the job, by default in the cache of
+    its output format.
+    """
+    lookup = lookup or OUTPUT_SINKS[output['format']].lookup
+    job = job_store.get(audio_id)
+    if job and job['status'] == 'completed' and job['progress'].get('degraded'):
+        # The output came partly from a fallback backend: synthesize it again
+        logger.info(f"Audio for {audio_id} was made by a fallback backend, generating it again")
+        return None
+    if lookup(audio_id):
+        logger.info(f"Audio cache hit for {audio_id}")
+        if job is None:
+            now = time.time()
+            job_store.create(audio_id, status='completed', started_at=now, finished_at=now,
+                             progress={'format': output['format']})
+        return {
+            'audio_id': audio_id,
+            'status': 'completed',
+            'message': 'Audio served from cache'
+        }
+    if job and job['status'] in ('queued', 'processing') and not job_is_running(audio_id, job):
+        # Left behind by a process that died: start the job again
+        fail_stale_job(audio_id)
+        return None
+    if job and job['status'] in ('queued', 'processing'):
+        logger.info(f"Audio for {audio_id} is already being generated")
+        return {
+            'audio_id': audio_id,
+            'status': job['status'],
+            'queue_position': scheduler.position(audio_id),
+            'message': 'Audio generation already in progress'
+        }
+    return None
+
+def queue_audio_job(audio_id, coro_factory, progress=None, on_rejected=None, defer=False):
+    """Record a new audio job and queue it on the scheduler.
+
+    Returns the JSON response for the client: the job id and queue position,
+    or a 429 when the queue is full. With defer the job waits for room in
+    the queue instead (see JobScheduler.submit). If an identical request
+    queued the job first, the response describes that job.
+    """
+    # Initialize status tracking
+    if not job_store.claim(audio_id, progress=progress or {}, owner=process_owner()):
+        job = job_store.get(audio_id)
+        logger.info(f"Audio for {audio_id} was queued by a concurrent request")
+        return jsonify({
+            'audio_id': audio_id,
+            'status': job['status'] if job else 'queued',
+            'queue_position': scheduler.position(audio_id),
+            'message': 'Audio generation already in progress'
+        })
+    try:
+        position = scheduler.submit(audio_id, coro_factory, client_id=client_id_for(request), defer=defer)
+    except QueueFullError as e:
+        job_store.delete(audio_id)
+        if on_rejected:
+            on_rejected()
+        logger.warning(f"Rejected audio generation for {audio_id}: {str(e)}")
+        response = jsonify({
+            'error': 'The server is busy, please try again shortly',
+            'queue_depth': scheduler.stats()['queued']
+        })
+        response.headers['Retry-After'] = '10'
+        return response, 429
+    
+    # Return immediately with the audio_id
+    # Client will poll for status
+    logger.info(f"Queued background TTS processing for {audio_id} at position {position}")
+    return jsonify({
+        'audio_id': audio_id, 
+        'status': 'queued',
+        'queue_position': position,
+        'message': 'Audio generation started in background'
+    })
+
+async def process_tts_in_background(text, voice, audio_path, audio_id, chars_total=None, output=None):
+    """Process TTS on the scheduler loop to avoid Vercel timeouts
+
+    text may be a string or an iterable of pages. chars_total is the total
+    length used for progress reporting; it defaults to len(text) and may be a
+    callable returning a running estimate for streamed input. output is the
+    output profile from parse_output, MP3 by default.
+    """
+    if chars_total is None and isinstance(text, str):
+        chars_total = len(text)
+    output = output or {'format': 'mp3'}
     try:
         logger.info(f"Background processing started for {audio_id}")
         start_time = time.time()
-        
-        # Create a placeholder file to indicate processing is happening
-        with open(audio_path + '.processing', 'w') as f:
-            f.write('Processing')
-        
-        # Set up a new event loop for this thread
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        job_store.update(audio_id, status='processing', started_at=start_time)
+
+        def on_progress(progress):
+            total = chars_total() if callable(chars_total) else chars_total
+            job_store.update(audio_id, progress=dict(progress, chars_total=total, format=output['format']))
         
         # Run the async TTS processing
-        result = loop.run_until_complete(process_text_in_chunks(text, voice, audio_path))
+        sink = create_audio_sink(output, audio_path)
+        sink_class = OUTPUT_SINKS[output['format']]
+        sink.fallback_path = sink_class.location(fallback_output_id(audio_id))
+        with span('process_tts_in_background', audio_id):
+            result = await process_text_in_chunks(text, voice, sink, on_progress=on_progress)
         
         # Check result and update status
-        if result and os.path.exists(audio_path) and os.path.getsize(audio_path) > 100:
-            JOB_STATUS[audio_id]['status'] = 'completed'
+        if result and sink.size() > 100:
+            job = job_store.get(audio_id)
+            progress = job['progress'] if job else {}
+            if sink.degraded:
+                # Served to this job only, never as the cached audio of the document
+                logger.warning(f"Audio for {audio_id} was made partly by a fallback backend, not caching it")
+                job_store.update(audio_id, status='completed', finished_at=time.time(),
+                                 progress=dict(progress, degraded=True, output_id=fallback_output_id(audio_id)))
+            else:
+                sink.register(audio_id)
+                job_store.update(audio_id, status='completed', finished_at=time.time())
             duration = time.time() - start_time
+            if duration > 0:
+                chars_done = progress.get('chars_done', 0)
+                JOB_CHARS_PER_SECOND.observe(chars_done / duration)
+                JOB_BYTES_PER_SECOND.observe(sink.size() / duration)
+            JOBS_FINISHED.inc(status='completed')
             logger.info(f"Background processing completed successfully for {audio_id} in {duration:.2f} seconds")
+            return True
         else:
-            JOB_STATUS[audio_id]['status'] = 'failed'
-            JOB_STATUS[audio_id]['error'] = 'Failed to generate audio file (file missing or empty)'
+            job_store.update(audio_id, status='failed', finished_at=time.time(),
+                             error='Failed to generate audio file (file missing or empty)')
             logger.error(f"Background processing failed for {audio_id}: audio file not created properly")
-        
-        # Clean up the processing indicator file
-        try:
-            if os.path.exists(audio_path + '.processing'):
-                os.remove(audio_path + '.processing')
-        except Exception as e:
-            logger.error(f"Error removing processing indicator file: {str(e)}")
             
     except Exception as e:
         error_msg = str(e)
         logger.error(f"Error in background TTS processing for {audio_id}: {error_msg}", exc_info=True)
-        JOB_STATUS[audio_id]['status'] = 'failed'
-        JOB_STATUS[audio_id]['error'] = f"Error generating audio: {error_msg}"
-        
-        # Create an error file to indicate failure
-        try:
-            with open(audio_path + '.error', 'w') as f:
-                f.write(f"Error: {error_msg}\n\n{traceback.format_exc()}")
-        except Exception:
-            pass
+        job_store.update(audio_id, status='failed', finished_at=time.time(),
+                         error=f"Error generating audio: {error_msg}")
+    JOBS_FINISHED.inc(status='failed')
+    return False
+
+@app.route('/convert', methods=['POST'])
+def convert_pdf():
+    """Convert an uploaded PDF straight to audio in a single request.
+
+    Extraction is pipelined into synthesis on the server, so the text never
+    travels back through the browser. Returns an audio job that can be
+    followed with /audio-status, /audio-events and /audio/<id>/stream.
+    """
+    if 'file' not in request.files:
+        logger.warning("No file part in request")
+        return jsonify({'error': 'No file part'}), 400
+
+    try:
+        output = parse_output(request.form.get('format'), request.form.get('bitrate'))
+    except OutputFormatError as e:
+        logger.warning(f"Rejected output format: {str(e)}")
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        if request.form.get('sections', '').lower() in ('1', 'true', 'yes'):
+            return start_section_conversion(request.files['file'], request.form.get('voice', 'en'), output)
+        return start_conversion(request.files['file'], request.form.get('voice', 'en'), output)
+    except Exception as e:
+        error_msg = str(e)
+        logger.error(f"Unexpected error in convert endpoint: {error_msg}", exc_info=True)
+        return jsonify({
+            'error': f'Unexpected error: {error_msg}',
+            'traceback': traceback.format_exc()
+        }), 500
+
+def start_conversion(file, lang_code, output, defer=False):
+    """Queue a PDF-to-audio job for an uploaded file and return the response for it."""
+    if file.filename == '' or not file.filename.lower().endswith('.pdf'):
+        logger.warning(f"Unsupported file for conversion: {file.filename!r}")
+        return jsonify({'error': 'Unsupported file type. Please upload a PDF file.'}), 400
+
+    voice = VOICE_MAPPING.get(lang_code, 'en-US-ChristopherNeural')
+    text_key = f"{pdf_digest(file)}-v{EXTRACTION_VERSION}"
+    audio_id = cache_key(f"pdf:{text_key}", voice, app.config['TTS_RATE'], output_tag(output))
+    existing = existing_audio_job(audio_id, output)
+    if existing:
+        return jsonify(existing)
+
+    # The upload is closed when this request ends, so keep a copy for the
+    # background job unless the text is already cached
+    pages = load_cached_pages(text_key)
+    pdf_path = None
+    if pages is None:
+        pdf_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{audio_id}.pdf")
+        persist_upload(file, pdf_path)
+
+    audio_path = OUTPUT_SINKS[output['format']].location(audio_id)
+    logger.info(f"Converting {file.filename} to {audio_path}")
+    return queue_audio_job(
+        audio_id,
+        lambda: process_convert_in_background(pdf_path, pages, voice, audio_path, audio_id, text_key, output),
+        progress={'format': output['format']},
+        on_rejected=lambda: pdf_path and os.path.exists(pdf_path) and os.remove(pdf_path),
+        defer=defer
+    )
+
+@app.route('/batch', methods=['POST'])
+def create_batch():
+    """Convert many PDFs in one call.
+
+    Each file becomes a regular conversion job on the shared worker pool, and
+    all of them are scheduled as one client so a batch cannot starve
+    interactive users. Documents beyond the client's share of the queue are
+    deferred rather than rejected: they are admitted one by one as the
+    client's earlier jobs are picked up. Jobs are content-addressed, so
+    resubmitting a batch resumes it: finished documents come straight from
+    the cache and only the missing ones are queued again.
+    """
+    files = request.files.getlist('files')
+    if not files:
+        logger.warning("No files in batch request")
+        return jsonify({'error': 'No files provided'}), 400
+
+    lang_code = request.form.get('voice', 'en')
+    try:
+        output = parse_output(request.form.get('format'), request.form.get('bitrate'))
+    except OutputFormatError as e:
+        logger.warning(f"Rejected output format: {str(e)}")
+        return jsonify({'error': str(e)}), 400
+
+    batch_id = f"batch-{uuid.uuid4().hex}"
+    documents = []
+    for file in files:
+        response, status_code = _as_response(start_conversion(file, lang_code, output, defer=True))
+        result = response.get_json()
+        documents.append({
+            'filename': file.filename,
+            'audio_id': result.get('audio_id'),
+            'status': result.get('status') if status_code < 400 else ('rejected' if status_code == 429 else 'failed'),
+            'error': result.get('error'),
+        })
+
+    job_store.create(batch_id, status='processing', started_at=time.time(),
+                     progress={'documents': documents})
+    logger.info(f"Created {batch_id} with {len(documents)} documents")
+    return jsonify(describe_batch(batch_id, job_store.get(batch_id)))
+
+def _as_response(rv):
+    """Normalize a view return value to (response, status_code)."""
+    if isinstance(rv, tuple):
+        return rv[0], rv[1]
+    return rv, rv.status_code
+
+@app.route('/batch/<batch_id>', methods=['GET'])
+def get_batch(batch_id):
+    """Per-document status and aggregate throughput of a batch."""
+    batch = job_store.get(batch_id)
+    if batch is None or not batch_id.startswith('batch-'):
+        return jsonify({'status': 'not_found', 'error': 'Batch not found'}), 404
+    return jsonify(describe_batch(batch_id, batch))
+
+def describe_batch(batch_id, batch):
+    """Combine the batch record with the current state of its documents."""
+    documents = []
+    counts = collections.Counter()
+    chars = 0
+    started = []
+    finished = []
+    for doc in batch['progress']['documents']:
+        job = job_store.get(doc['audio_id']) if doc['audio_id'] else None
+        if job is not None:
+            doc = dict(doc, status=job['status'], error=job['error'])
+            chars += job['progress'].get('chars_done', 0)
+            if job['started_at']:
+                started.append(job['started_at'])
+            if job['finished_at']:
+                finished.append(job['finished_at'])
+        counts[doc['status']] += 1
+        documents.append(doc)
+
+    done = counts['completed'] + counts['failed'] + counts['rejected']
+    status = 'completed' if done == len(documents) else 'processing'
+    if status == 'completed' and batch['status'] != 'completed':
+        job_store.update(batch_id, status='completed', finished_at=max(finished, default=time.time()))
+
+    elapsed = (max(finished) if status == 'completed' and finished else time.time()) - min(started, default=time.time())
+    return {
+        'batch_id': batch_id,
+        'status': status,
+        'documents': documents,
+        'counts': dict(counts),
+        'docs_per_min': round(counts['completed'] * 60 / elapsed, 2) if elapsed > 0 else None,
+        'chars_per_sec': round(chars / elapsed, 1) if elapsed > 0 else None,
+    }
+
+def persist_upload(file, dest_path):
+    """Keep an uploaded file at dest_path beyond the end of the request.
+
+    Spooled uploads are hard-linked rather than copied where possible. The
+    file is moved into place in one step, so a job already reading an
+    earlier upload of the same document at dest_path is not disturbed.
+    """
+    source = pdf_source(file)
+    tmp_path = f"{dest_path}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        if isinstance(source, str):
+            try:
+                os.link(source, tmp_path)
+            except OSError:
+                shutil.copyfile(source, tmp_path)
+        else:
+            with open(tmp_path, 'wb') as f:
+                f.write(source.getbuffer() if hasattr(source, 'getbuffer') else source.read())
+        os.replace(tmp_path, dest_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+async def process_convert_in_background(pdf_path, pages, voice, audio_path, audio_id, text_key, output=None):
+    """Extract a PDF page by page and synthesize the pages as they arrive."""
+    seen = {'pages': 0, 'chars': 0, 'pages_total': None}
+    cache_writer = CachedPagesWriter(text_key) if pages is None else None
+
+    def tracked_pages():
+        if pages is not None:
+            seen['pages_total'] = len(pages)
+            source = pages
+        else:
+            with open_pdf_file(pdf_path) as f:
+                seen['pages_total'] = len(PyPDF2.PdfReader(f).pages)
+            source = iter_pdf_pages(pdf_path)
+        for page_text in source:
+            seen['pages'] += 1
+            seen['chars'] += len(page_text)
+            if cache_writer:
+                cache_writer.add(page_text)
+            yield page_text
+
+    def estimated_chars():
+        # Extrapolate from the pages extracted so far
+        if not seen['pages'] or not seen['pages_total']:
+            return None
+        return int(seen['chars'] * seen['pages_total'] / seen['pages'])
+
+    try:
+        ok = await process_tts_in_background(tracked_pages(), voice, audio_path, audio_id,
+                                             chars_total=estimated_chars, output=output)
+        if ok and cache_writer:
+            cache_writer.commit()
+            cache_writer = None
+    finally:
+        if cache_writer:
+            cache_writer.discard()
+        if pdf_path and os.path.exists(pdf_path):
+            os.remove(pdf_path)
+
+def start_section_conversion(file, lang_code, output):
+    """Queue a sectioned PDF-to-audio job for an uploaded file and return the response for it."""
+    if file.filename == '' or not file.filename.lower().endswith('.pdf'):
+        logger.warning(f"Unsupported file for conversion: {file.filename!r}")
+        return jsonify({'error': 'Unsupported file type. Please upload a PDF file.'}), 400
+
+    voice = VOICE_MAPPING.get(lang_code, 'en-US-ChristopherNeural')
+    text_key = f"{pdf_digest(file)}-v{EXTRACTION_VERSION}"
+    audio_id = cache_key(f"sections:{text_key}", voice, app.config['TTS_RATE'], output_tag(output))
+    existing = existing_audio_job(audio_id, output, lookup=sections_complete)
+    if existing:
+        return jsonify(existing)
+
+    # The outline is read from the PDF even when its text is cached
+    pdf_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{audio_id}.pdf")
+    persist_upload(file, pdf_path)
+    pages = load_cached_pages(text_key)
+    logger.info(f"Converting {file.filename} to sections of {audio_id}")
+    return queue_audio_job(
+        audio_id,
+        lambda: process_sections_in_background(pdf_path, pages, voice, audio_id, text_key, output),
+        progress={'format': output['format']},
+        on_rejected=lambda: os.path.exists(pdf_path) and os.remove(pdf_path)
+    )
+
+def document_sections(reader):
+    """Split a document into sections at its top-level bookmarks.
+
+    Returns a list of dicts with a 'title' and the page range from 'start'
+    to 'stop' (0-based, stop exclusive). Pages before the first bookmark
+    become a section of their own. Documents with fewer than two usable
+    bookmarks are split every SECTION_PAGES pages instead.
+    """
+    page_count = len(reader.pages)
+    titles = {}  # first page -> title
+    try:
+        for item in reader.outline:
+            # Nested lists hold the children of the entry before them
+            if isinstance(item, list):
+                continue
+            page = reader.get_destination_page_number(item)
+            if page is not None and 0 <= page < page_count and page not in titles:
+                titles[page] = str(item.title or '').strip() or None
+    except Exception as e:
+        logger.warning(f"Could not read the document outline, splitting by pages: {str(e)}")
+        titles = {}
+
+    if len(titles) < 2:
+        titles = dict.fromkeys(range(0, page_count, max(1, app.config['SECTION_PAGES'])))
+    elif 0 not in titles:
+        titles[0] = None
+    starts = sorted(titles)
+    sections = []
+    for start, stop in zip(starts, starts[1:] + [page_count]):
+        title = titles[start] or (f"Pages {start + 1}-{stop}" if stop - start > 1 else f"Page {start + 1}")
+        sections.append({'title': title, 'start': start, 'stop': stop})
+    return sections
+
+def load_manifest(audio_id):
+    data = manifest_cache.get_bytes(audio_id)
+    if data is None:
+        return None
+    try:
+        return json.loads(data)
+    except ValueError:
+        return None
+
+def sections_complete(audio_id):
+    """Whether a sectioned job has finished and the audio of all its sections is still cached.
+
+    Sections made by a fallback backend do not count, so that they are
+    synthesized again.
+    """
+    manifest = load_manifest(audio_id)
+    if manifest is None or manifest['status'] != 'completed':
+        return False
+    sink_class = OUTPUT_SINKS[manifest['format']]
+    return all(sink_class.lookup(section['audio_id']) and not section.get('degraded')
+               for section in manifest['sections'] if section['audio_id'])
+
+async def process_sections_in_background(pdf_path, pages, voice, audio_id, text_key, output):
+    """Convert a PDF into one audio file per section, described by a manifest.
+
+    Sections are synthesized in order, each stored like a document of its
+    own under the cache key of its text. Sections that are already cached
+    are skipped, so a job that failed or was interrupted resumes after the
+    last completed section when the document is submitted again, and after
+    an edit only the sections whose text changed are synthesized. The
+    manifest is saved after every section.
+    """
+    sink_class = OUTPUT_SINKS[output['format']]
+    tag = output_tag(output)
+    start_time = time.time()
+    progress = {'format': output['format'], 'sections_done': 0, 'sections_reused': 0,
+                'chars_done': 0, 'chars_total': None}
+    seen = {'pages': 0, 'chars': 0}
+    cache_writer = None
+    manifest = None
+
+    def save_manifest():
+        manifest['updated_at'] = time.time()
+        manifest_cache.put_bytes(audio_id, json.dumps(manifest).encode('utf-8'))
+
+    def update_progress(**fields):
+        progress.update(fields)
+        if seen['pages']:
+            progress['chars_total'] = max(progress['chars_done'],
+                                          int(seen['chars'] * seen['pages_total'] / seen['pages']))
+        job_store.update(audio_id, progress=dict(progress))
+
+    try:
+        logger.info(f"Sectioned processing started for {audio_id}")
+        job_store.update(audio_id, status='processing', started_at=start_time)
+
+        def read_sections():
+            with open_pdf_file(pdf_path) as f:
+                reader = PyPDF2.PdfReader(f)
+                return len(reader.pages), document_sections(reader)
+
+        loop = asyncio.get_running_loop()
+        # Parsing the PDF and its outline blocks, keep it off the event loop
+        seen['pages_total'], sections = await loop.run_in_executor(None, read_sections)
+        manifest = {
+            'audio_id': audio_id,
+            'voice': voice,
+            'format': output['format'],
+            'bitrate': output.get('bitrate'),
+            'status': 'processing',
+            'sections': [{'index': n, 'title': section['title'], 'pages': [section['start'] + 1, section['stop']],
+                          'audio_id': None, 'chars': None, 'status': 'pending', 'reused': False,
+                          'degraded': False}
+                         for n, section in enumerate(sections)],
+        }
+        save_manifest()
+        update_progress(sections_total=len(sections))
+
+        if pages is None:
+            cache_writer = CachedPagesWriter(text_key)
+        page_iter = iter(pages) if pages is not None else iter_pdf_pages(pdf_path)
+        for section, entry in zip(sections, manifest['sections']):
+            texts = []
+            for _ in range(section['stop'] - section['start']):
+                # Pulling the next page may parse the PDF, keep that off the event loop
+                page_text = await loop.run_in_executor(None, next, page_iter, None)
+                if page_text is None:
+                    break
+                texts.append(page_text)
+                seen['pages'] += 1
+                seen['chars'] += len(page_text)
+                if cache_writer:
+                    cache_writer.add(page_text)
+            text = '\n\n'.join(page_text for page_text in texts if page_text.strip())
+            entry['chars'] = len(text)
+            chars_before = progress['chars_done']
+
+            if not text:
+                entry['status'] = 'empty'
+            else:
+                section_id = cache_key(text, voice, app.config['TTS_RATE'], tag)
+                entry['audio_id'] = section_id
+                if sink_class.lookup(section_id):
+                    entry['reused'] = True
+                    progress['sections_reused'] += 1
+                else:
+                    sink = create_audio_sink(output, sink_class.location(section_id))
+                    # Fallback audio goes under a key of its own, so that the section
+                    # is synthesized again when the document is resubmitted
+                    fallback_id = cache_key(text, f"fallback:{voice}", app.config['TTS_RATE'], tag)
+                    sink.fallback_path = sink_class.location(fallback_id)
+                    with span('synthesize_section', audio_id):
+                        result = await process_text_in_chunks(
+                            text, voice, sink,
+                            on_progress=lambda p: update_progress(chars_done=chars_before + p['chars_done']))
+                    if not result or sink.size() <= 100:
+                        entry['status'] = 'failed'
+                        raise TTSBackendError(f"Section {entry['index'] + 1} ({entry['title']}) could not be synthesized")
+                    if sink.degraded:
+                        section_id = fallback_id
+                        entry['audio_id'] = section_id
+                        entry['degraded'] = True
+                    sink.register(section_id)
+                entry['status'] = 'completed'
+
+            save_manifest()
+            update_progress(sections_done=progress['sections_done'] + 1, chars_done=chars_before + len(text))
+            logger.debug("Section %d of %s done (%s)", entry['index'], audio_id,
+                         'reused' if entry['reused'] else entry['status'])
+
+        manifest['status'] = 'completed'
+        save_manifest()
+        if cache_writer:
+            cache_writer.commit()
+            cache_writer = None
+        job_store.update(audio_id, status='completed', finished_at=time.time())
+        duration = time.time() - start_time
+        if duration > 0:
+            JOB_CHARS_PER_SECOND.observe(progress['chars_done'] / duration)
+        JOBS_FINISHED.inc(status='completed')
+        logger.info(f"Sectioned processing completed for {audio_id}: {len(sections)} sections, "
+                    f"{progress['sections_reused']} reused, in {duration:.2f} seconds")
+        return True
+    except Exception as e:
+        error_msg = str(e)
+        logger.error(f"Error in sectioned processing for {audio_id}: {error_msg}", exc_info=True)
+        if manifest is not None:
+            manifest['status'] = 'failed'
+            save_manifest()
+        job_store.update(audio_id, status='failed', finished_at=time.time(),
+                         error=f"Error generating audio: {error_msg}")
+    finally:
+        if cache_writer:
+            cache_writer.discard()
+        if os.path.exists(pdf_path):
+            os.remove(pdf_path)
+    JOBS_FINISHED.inc(status='failed')
+    return False
+
+def describe_job(job_id, job):
+    """Add derived fields (queue position, completion ratio, ETA) to a job record."""
+    if job['status'] == 'queued':
+        job['queue_position'] = scheduler.position(job_id)
+
+    progress = job['progress']
+    chars_total = progress.get('chars_total')
+    chars_done = progress.get('chars_done', 0)
+    if job['status'] == 'completed':
+        job['fraction_done'] = 1.0
+        job['eta_seconds'] = 0
+    elif chars_total:
+        job['fraction_done'] = min(1.0, chars_done / chars_total)
+        elapsed = time.time() - job['started_at'] if job['started_at'] else 0
+        if chars_done and elapsed > 0:
+            job['eta_seconds'] = round((chars_total - chars_done) * elapsed / chars_done, 1)
+    return job
 
 @app.route('/audio-status/<audio_id>', methods=['GET'])
 def get_audio_status(audio_id):
     """Check the status of an audio generation job"""
-    if audio_id in JOB_STATUS:
-        status_info = JOB_STATUS[audio_id]
-        return jsonify(status_info)
-    
-    # If not in JOB_STATUS, check if file exists (might have been generated in a previous run)
-    audio_path = os.path.join(app.config['AUDIO_FOLDER'], f"{audio_id}.mp3")
-    if os.path.exists(audio_path) and os.path.getsize(audio_path) > 100:
-        return jsonify({'status': 'completed', 'error': None})
-    
-    # Check for error file
-    if os.path.exists(audio_path + '.error'):
+    job = job_store.get(audio_id)
+    if job is None:
+        return jsonify({'status': 'not_found', 'error': 'Audio job not found'}), 404
+
+    return jsonify(describe_job(audio_id, job))
+
+@app.route('/audio-events/<audio_id>', methods=['GET'])
+def get_audio_events(audio_id):
+    """Stream status and progress of an audio generation job as Server-Sent Events.
+
+    An event is sent whenever the job changes, and the stream ends once the
+    job has completed or failed. Long streams are closed after SSE_MAX_SECONDS
+    and the browser's EventSource reconnects on its own.
+    """
+    poll_interval = app.config['SSE_POLL_INTERVAL']
+    deadline = time.monotonic() + app.config['SSE_MAX_SECONDS']
+
+    def events():
+        last_update = None
+        last_sent = time.monotonic()
+        while time.monotonic() < deadline:
+            job = job_store.get(audio_id)
+            if job is None:
+                yield f"data: {json.dumps({'status': 'not_found', 'error': 'Audio job not found'})}\n\n"
+                return
+
+            if job['updated_at'] != last_update:
+                last_update = job['updated_at']
+                last_sent = time.monotonic()
+                yield f"data: {json.dumps(describe_job(audio_id, job))}\n\n"
+                if job['status'] in ('completed', 'failed'):
+                    return
+            elif time.monotonic() - last_sent > 15:
+                # Comment line to keep proxies from closing an idle connection
+                last_sent = time.monotonic()
+                yield ": keep-alive\n\n"
+
+            job_store.wait_for_change(poll_interval)
+
+        # Ask the browser to reconnect promptly rather than after its default delay
+        yield "retry: 500\n\n"
+
+    return Response(stream_with_context(events()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+
+def split_text_into_chunks(text, max_chars=None):
+    """Split text into synthesis chunks at paragraph and sentence boundaries.
+
+    Paragraphs are packed together until a chunk would exceed max_chars. A
+    paragraph that is too long on its own is split into sentences, and a
+    sentence that is still too long is split at the last whitespace that fits.
+
+    Args:
+        text (str): The text to split
+        max_chars (int): Target maximum chunk length in characters
+
+    Returns:
+        list: Non-empty text chunks in document order
+    """
+    if max_chars is None:
+        max_chars = app.config['TTS_CHUNK_CHARS']
+
+    chunks = []
+    current = []
+    current_len = 0
+
+    def flush():
+        nonlocal current, current_len
+        if current:
+            chunks.append(''.join(current))
+        current = []
+        current_len = 0
+
+    for paragraph in PARAGRAPH_BREAK_RE.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+
+        if len(paragraph) <= max_chars:
+            pieces = [paragraph]
+        else:
+            pieces = []
+            for sentence in SENTENCE_BREAK_RE.split(paragraph):
+                while len(sentence) > max_chars:
+                    cut = sentence.rfind(' ', 0, max_chars)
+                    if cut <= 0:
+                        cut = max_chars
+                    pieces.append(sentence[:cut])
+                    sentence = sentence[cut:].lstrip()
+                if sentence:
+                    pieces.append(sentence)
+
+        separator = '\n\n'
+        for piece in pieces:
+            if current and current_len + len(separator) + len(piece) > max_chars:
+                flush()
+            if current:
+                current.append(separator)
+                current_len += len(separator)
+            current.append(piece)
+            current_len += len(piece)
+            separator = ' '
+
+        # Keep paragraph boundaries as chunk boundaries once a chunk is well filled,
+        # so that pauses in the audio fall where the reader expects them.
+        if current_len >= max_chars // 2:
+            flush()
+
+    flush()
+    return chunks
+
+def strip_id3_tag(data):
+    """Drop a leading ID3v2 tag so MP3 segments can be stitched frame to frame."""
+    if data[:3] == b'ID3' and len(data) >= 10:
+        # ID3v2 size is a 28-bit syncsafe integer following the 6-byte header
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        return data[10 + size:]
+    return data
+
+class TTSBackendError(Exception):
+    pass
+
+class CircuitOpenError(TTSBackendError):
+    pass
+
+class RateLimitedError(TTSBackendError):
+    pass
+
+class TokenBucket:
+    """Paces requests to `rate` per second, allowing bursts of up to `burst`.
+
+    The rate adapts to the upstream: slow_down() halves it when we get
+    throttled and speed_up() wins back a tenth of the configured rate per
+    successful request, so the pace settles just below the upstream's limit.
+    """
+
+    def __init__(self, rate, burst):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    async def acquire(self, max_wait=None):
+        """Wait for a token. Raises RateLimitedError if that would take longer than max_wait."""
+        if self.max_rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            wait = (1 - self.tokens) / self.rate if self.tokens < 1 else 0
+            if max_wait is not None and wait > max_wait:
+                raise RateLimitedError(f"Upstream busy, next request slot in {wait:.0f} seconds")
+            # Reserve the token now, so that waiting callers queue up behind each other
+            self.tokens -= 1
+        if wait:
+            await asyncio.sleep(wait)
+
+    def slow_down(self):
+        with self._lock:
+            self.rate = max(self.max_rate / 20, self.rate / 2)
+
+    def speed_up(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+class CircuitBreaker:
+    """Stops sending requests to a backend that keeps failing.
+
+    After `threshold` consecutive failures the circuit opens and requests are
+    refused for `reset_timeout` seconds. Then a single probe request is let
+    through (half-open); its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, threshold, reset_timeout):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self.times_opened = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'half-open'
+                self._probing = False
+            if self.state == 'half-open':
+                if self._probing:
+                    return False
+                self._probing = True
+            return self.state != 'open'
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half-open' or self.failures >= self.threshold:
+                if self.state != 'open':
+                    self.times_opened += 1
+                    logger.warning(f"Circuit opened after {self.failures} consecutive failures")
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+                self._probing = False
+
+    def release(self):
+        """Let another probe through when the current one was cancelled."""
+        with self._lock:
+            self._probing = False
+
+class TTSBackend:
+    """A speech synthesis engine that turns one chunk of text into MP3 bytes.
+
+    Subclasses implement _synthesize. Every backend produces 24 kHz mono MP3
+    so that chunks from different backends can be stitched into one file.
+    At most `concurrency` requests run against a backend at the same time.
+    """
+
+    name = None
+    # Backends that stream audio report time-to-first-byte themselves
+    streams = False
+
+    def __init__(self, concurrency):
+        self.concurrency = concurrency
+        self.breaker = CircuitBreaker(app.config['TTS_BREAKER_FAILURES'], app.config['TTS_BREAKER_RESET'])
+        self.rate_limiter = None
+        self.max_wait = None
+        self._semaphores = {}  # event loop -> asyncio.Semaphore
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.chars = 0
+        self.bytes = 0
+
+    def available(self):
+        """Whether the backend can be used in this environment."""
+        return True
+
+    def _semaphore(self):
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.concurrency)
+        return semaphore
+
+    async def synthesize(self, text, voice, rate, timeout):
+        """Synthesize text and return MP3 bytes, raising on failure or timeout.
+
+        Raises CircuitOpenError or RateLimitedError without contacting the
+        backend when it is failing or too busy to take the request.
+        """
+        async with self._semaphore():
+            if not self.breaker.allow():
+                raise CircuitOpenError(f"{self.name} is failing, not sending requests for now")
+            try:
+                if self.rate_limiter is not None:
+                    await self.rate_limiter.acquire(self.max_wait)
+            except BaseException:
+                self.breaker.release()
+                raise
+            self.in_flight += 1
+            self.requests += 1
+            start = time.perf_counter()
+            try:
+                async with asyncio.timeout(timeout):
+                    data = await self._synthesize(text, voice, rate)
+                if not data:
+                    raise TTSBackendError("No audio received")
+            except asyncio.CancelledError:
+                self.breaker.release()
+                raise
+            except Exception:
+                self.failures += 1
+                TTS_FAILURES.inc(backend=self.name)
+                self.breaker.record_failure()
+                raise
+            finally:
+                self.in_flight -= 1
+        elapsed = time.perf_counter() - start
+        if not self.streams:
+            # The whole reply arrives at once
+            TTS_FIRST_BYTE_SECONDS.observe(elapsed, backend=self.name)
+        TTS_REQUEST_SECONDS.observe(elapsed, backend=self.name)
+        TTS_CHARS.inc(len(text), backend=self.name)
+        TTS_BYTES.inc(len(data), backend=self.name)
+        self.breaker.record_success()
+        self.chars += len(text)
+        self.bytes += len(data)
+        return data
+
+    async def _synthesize(self, text, voice, rate):
+        raise NotImplementedError
+
+    async def close(self):
+        """Release connections held for the running event loop."""
+
+    def stats(self):
+        return {
+            'available': self.available(),
+            'circuit': self.breaker.state,
+            'circuit_opened': self.breaker.times_opened,
+            'concurrency': self.concurrency,
+            'in_flight': self.in_flight,
+            'requests': self.requests,
+            'failures': self.failures,
+            'chars': self.chars,
+            'bytes': self.bytes,
+        }
+
+class StaleConnectionError(TTSBackendError):
+    pass
+
+class EdgeTTSBackend(TTSBackend):
+    """Microsoft Edge online voices, speaking the edge_tts websocket protocol.
+
+    Unlike edge_tts.Communicate, which opens a new HTTP session and websocket
+    for every request, connections are kept open and reused, up to one per
+    concurrent request. Requests are paced by a token bucket that backs off
+    when the service answers 429.
+    """
+
+    name = 'edge'
+    streams = True
+    HEADERS = {
+        "Pragma": "no-cache",
+        "Cache-Control": "no-cache",
+        "Origin": "chrome-extension://jdiccldimpdaibmpdkjnbmckianbfold",
+        "Accept-Encoding": "gzip, deflate, br",
+        "Accept-Language": "en-US,en;q=0.9",
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+                      " (KHTML, like Gecko) Chrome/91.0.4472.77 Safari/537.36 Edg/91.0.864.41",
+    }
+    SPEECH_CONFIG = (
+        "Content-Type:application/json; charset=utf-8\r\n"
+        "Path:speech.config\r\n\r\n"
+        '{"context":{"synthesis":{"audio":{"metadataoptions":{'
+        '"sentenceBoundaryEnabled":false,"wordBoundaryEnabled":false},'
+        '"outputFormat":"audio-24khz-48kbitrate-mono-mp3"}}}}\r\n'
+    )
+
+    def __init__(self, concurrency, wss_url=None):
+        super().__init__(concurrency)
+        self.wss_url = wss_url or app.config['EDGE_TTS_WSS_URL']
+        self.rate_limiter = TokenBucket(app.config['EDGE_TTS_RATE_LIMIT'], app.config['EDGE_TTS_BURST'])
+        self.max_wait = app.config['EDGE_TTS_MAX_WAIT']
+        self.connections_opened = 0
+        self.connections_reused = 0
+        self._ssl = ssl.create_default_context(cafile=certifi.where())
+        self._sessions = {}  # event loop -> aiohttp.ClientSession
+        self._idle = {}  # event loop -> idle websockets
+
+    async def _connect(self):
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            session = self._sessions[loop] = aiohttp.ClientSession(trust_env=True)
         try:
-            with open(audio_path + '.error', 'r') as f:
-                error_msg = f.read()
-            return jsonify({'status': 'failed', 'error': error_msg})
-        except Exception:
-            pass
-    
-    # Check for processing file
-    if os.path.exists(audio_path + '.processing'):
-        return jsonify({'status': 'processing', 'error': None})
-    
-    # If we can't determine status, assume it doesn't exist
-    return jsonify({'status': 'not_found', 'error': 'Audio job not found'}), 404
+            websocket = await session.ws_connect(
+                f"{self.wss_url}&ConnectionId={connect_id()}", compress=15, autoping=True,
+                headers=self.HEADERS, ssl=self._ssl)
+        except aiohttp.WSServerHandshakeError as e:
+            if e.status == 429:
+                self.rate_limiter.slow_down()
+                raise TTSBackendError("Throttled by the service (429)") from e
+            raise
+        await websocket.send_str(f"X-Timestamp:{date_to_string()}\r\n{self.SPEECH_CONFIG}")
+        self.connections_opened += 1
+        return websocket
 
-async def process_text_in_chunks(text, voice, output_path):
-    """Process text for speech synthesis.
-    
-    Note: This function name is preserved for compatibility, but it now processes
-    the entire text at once instead of in chunks.
+    def _checkout(self):
+        idle = self._idle.setdefault(asyncio.get_running_loop(), [])
+        while idle:
+            websocket = idle.pop()
+            if not websocket.closed:
+                self.connections_reused += 1
+                return websocket
+        return None
+
+    async def _checkin(self, websocket):
+        idle = self._idle.setdefault(asyncio.get_running_loop(), [])
+        if websocket.closed:
+            return
+        if len(idle) < self.concurrency:
+            idle.append(websocket)
+        else:
+            await websocket.close()
+
+    async def _turn(self, websocket, ssml, reused):
+        """Send one SSML request and collect the audio of the reply."""
+        started = False
+        audio = bytearray()
+        try:
+            sent_at = time.perf_counter()
+            await websocket.send_str(ssml_headers_plus_data(connect_id(), date_to_string(), ssml))
+            async for message in websocket:
+                if message.type == aiohttp.WSMsgType.TEXT:
+                    path = get_headers_and_data(message.data)[0].get(b"Path")
+                    if path == b"turn.start":
+                        started = True
+                    elif path == b"turn.end":
+                        return bytes(audio)
+                elif message.type == aiohttp.WSMsgType.BINARY:
+                    if not audio:
+                        TTS_FIRST_BYTE_SECONDS.observe(time.perf_counter() - sent_at, backend=self.name)
+                    header_length = int.from_bytes(message.data[:2], "big")
+                    audio += message.data[header_length + 2:]
+                elif message.type == aiohttp.WSMsgType.ERROR:
+                    raise TTSBackendError(f"Websocket error: {message.data}")
+        except ConnectionError:
+            if reused and not started:
+                raise StaleConnectionError()
+            raise
+        if reused and not started:
+            # The service closed the idle connection before we used it
+            raise StaleConnectionError()
+        raise TTSBackendError("Connection closed before the audio was complete")
+
+    async def _request(self, ssml):
+        websocket = self._checkout()
+        reused = websocket is not None
+        if websocket is None:
+            websocket = await self._connect()
+        try:
+            try:
+                data = await self._turn(websocket, ssml, reused)
+            except StaleConnectionError:
+                await websocket.close()
+                websocket = await self._connect()
+                data = await self._turn(websocket, ssml, False)
+        except BaseException:
+            await websocket.close()
+            raise
+        await self._checkin(websocket)
+        return data
+
+    async def _synthesize(self, text, voice, rate):
+        # Communicate validates and expands the voice name and rate
+        options = edge_tts.Communicate(text, voice, rate=rate)
+        max_size = calc_max_mesg_size(options.voice, options.rate, options.volume, options.pitch)
+        audio = bytearray()
+        for piece in split_text_by_byte_length(escape(remove_incompatible_characters(text)), max_size):
+            audio += await self._request(
+                mkssml(piece, options.voice, options.rate, options.volume, options.pitch))
+        self.rate_limiter.speed_up()
+        return bytes(audio)
+
+    async def close(self):
+        loop = asyncio.get_running_loop()
+        for websocket in self._idle.pop(loop, []):
+            await websocket.close()
+        session = self._sessions.pop(loop, None)
+        if session is not None:
+            await session.close()
+
+    def stats(self):
+        stats = super().stats()
+        stats.update({
+            'connections_opened': self.connections_opened,
+            'connections_reused': self.connections_reused,
+            'rate_limit': round(self.rate_limiter.rate, 2),
+        })
+        return stats
+
+class EspeakTTSBackend(TTSBackend):
+    """Offline synthesis with espeak-ng, encoded to MP3 with lame or ffmpeg.
+
+    Sounds robotic, but works without network access, so it is useful as a
+    last-resort fallback and for running the pipeline offline.
     """
-    logger.info(f"Processing text for audio generation, length: {len(text)} characters")
-    
-    # Maximum text length to process (to avoid excessive processing time)
-    max_length = 20000
-    
-    # Check if text is too long and truncate if necessary
-    if len(text) > max_length:
-        logger.warning(f"Text is too long ({len(text)} chars), truncating to {max_length} chars")
-        # Try to truncate at a sentence boundary
-        truncated_text = text[:max_length]
-        last_period = truncated_text.rfind('.')
-        if last_period > max_length * 0.8:  # If we can find a period in the last 20% of the text
-            truncated_text = truncated_text[:last_period+1]
-        text = truncated_text + "\n\n[Text was truncated due to length limitations.]"
-    
-    # Try with retries for the entire text
-    max_retries = 2
-    success = False
-    
-    for retry in range(max_retries + 1):
-        if retry > 0:
-            logger.info(f"Retry {retry}/{max_retries} for full text generation")
-        
+
+    name = 'espeak'
+    BASE_WORDS_PER_MINUTE = 175
+
+    def __init__(self, concurrency):
+        super().__init__(concurrency)
+        self.espeak = shutil.which('espeak-ng') or shutil.which('espeak')
+        self.lame = shutil.which('lame')
+        self.ffmpeg = shutil.which('ffmpeg')
+
+    def available(self):
+        return bool(self.espeak and (self.lame or self.ffmpeg))
+
+    @staticmethod
+    def espeak_voice(voice):
+        # 'en-US-ChristopherNeural' -> 'en-us'
+        return '-'.join(voice.split('-')[:2]).lower()
+
+    def encoder_command(self):
+        if self.lame:
+            # -t: no Xing/LAME info frame, which would play as a click mid-file
+            return [self.lame, '--quiet', '-t', '-m', 'm', '-b', '48', '--resample', '24', '-', '-']
+        return [self.ffmpeg, '-loglevel', 'error', '-f', 'wav', '-i', 'pipe:0',
+                '-ac', '1', '-ar', '24000', '-b:a', '48k', '-write_xing', '0',
+                '-id3v2_version', '0', '-f', 'mp3', 'pipe:1']
+
+    async def _run(self, command, data):
+        process = await asyncio.create_subprocess_exec(
+            *command, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE)
         try:
-            # Generate speech for the entire text at once
-            success = await generate_speech_full(text, voice, output_path)
-            if success:
-                logger.info(f"Successfully generated audio at {output_path}")
+            stdout, stderr = await process.communicate(data)
+        except asyncio.CancelledError:
+            process.kill()
+            raise
+        if process.returncode != 0:
+            raise TTSBackendError(f"{os.path.basename(command[0])} exited with {process.returncode}: "
+                                  f"{stderr.decode(errors='replace').strip()[:200]}")
+        return stdout
+
+    async def _synthesize(self, text, voice, rate):
+        if not self.available():
+            raise TTSBackendError("espeak-ng and lame or ffmpeg are required")
+        speed = int(self.BASE_WORDS_PER_MINUTE * (100 + int(rate.rstrip('%'))) / 100)
+        wav = await self._run([self.espeak, '--stdout', '-v', self.espeak_voice(voice),
+                               '-s', str(speed), '--stdin'], text.encode('utf-8'))
+        return await self._run(self.encoder_command(), wav)
+
+class FakeTTSBackend(TTSBackend):
+    """Deterministic backend for load tests, benchmarks and offline runs.
+
+    Waits `latency` seconds, then returns silent but valid MP3 frames in the
+    same format as Edge (MPEG-2 Layer III, 24 kHz, 48 kbit/s, mono), as many
+    as reading the text at chars_per_second would take.
+    """
+
+    name = 'fake'
+    FRAME = b'\xff\xf3\x64\xc0' + bytes(140)
+    FRAME_SECONDS = 576 / 24000
+
+    def __init__(self, concurrency, latency=0.0, chars_per_second=15):
+        super().__init__(concurrency)
+        self.latency = latency
+        self.chars_per_second = chars_per_second
+
+    async def _synthesize(self, text, voice, rate):
+        await asyncio.sleep(self.latency)
+        frames = max(1, round(len(text) / self.chars_per_second / self.FRAME_SECONDS))
+        return self.FRAME * frames
+
+TTS_BACKEND_CLASSES = {cls.name: cls for cls in (EdgeTTSBackend, EspeakTTSBackend, FakeTTSBackend)}
+
+def create_tts_backends(names=None):
+    """Build the backends listed in TTS_BACKENDS, skipping unavailable ones."""
+    if names is None:
+        names = app.config['TTS_BACKENDS']
+    backends = []
+    for name in (n.strip() for n in names.split(',')):
+        if not name:
+            continue
+        cls = TTS_BACKEND_CLASSES.get(name)
+        if cls is None:
+            logger.error(f"Unknown TTS backend '{name}', ignoring it")
+            continue
+        kwargs = {'latency': app.config['TTS_FAKE_LATENCY']} if cls is FakeTTSBackend else {}
+        backend = cls(app.config[f'TTS_{name.upper()}_CONCURRENCY'], **kwargs)
+        if not backend.available():
+            logger.warning(f"TTS backend '{name}' is not available here, ignoring it")
+            continue
+        backends.append(backend)
+    if not backends:
+        logger.error("No usable TTS backend configured, falling back to edge")
+        backends.append(EdgeTTSBackend(app.config['TTS_EDGE_CONCURRENCY']))
+    return backends
+
+tts_backends = create_tts_backends()
+
+async def close_tts_backends(backends=None):
+    """Close the connections the backends opened on the running event loop."""
+    for backend in backends if backends is not None else tts_backends:
+        await backend.close()
+
+def segment_key(text, voice, backend):
+    # Edge segments keep their original keys; audio from other backends is
+    # cached separately so it never replaces the preferred voice
+    if backend.name != 'edge':
+        voice = f"{backend.name}:{voice}"
+    return cache_key(text, voice, app.config['TTS_RATE'])
+
+async def synthesize_chunk(text, voice, index=0, backends=None, on_fallback=None):
+    """Synthesize a single chunk of text and return its MP3 bytes.
+
+    Each chunk is retried on its own, with exponential backoff. A timeout
+    counts as a failed attempt instead of silently keeping a truncated
+    stream. When every attempt on a backend fails, or the backend sheds the
+    request, the chunk moves on to the next one. Results are stored in
+    the segment cache, so the same chunk is only ever synthesized once.
+
+    Args:
+        text (str): The chunk of text to convert to speech
+        voice (str): The voice to use
+        index (int): Position of the chunk in the document, for logging
+        backends (list): TTSBackend instances in order of preference,
+            defaults to the configured tts_backends
+        on_fallback: Optional callable receiving the backend when the chunk
+            was synthesized by one other than the first
+
+    Returns:
+        bytes: The MP3 audio for the chunk
+
+    Raises:
+        Exception: If every attempt on every backend fails
+    """
+    if backends is None:
+        backends = tts_backends
+
+    cached = segment_cache.get_bytes(segment_key(text, voice, backends[0]))
+    if cached:
+        logger.debug("Segment cache hit for chunk %d", index)
+        return cached
+
+    max_retries = app.config['TTS_CHUNK_RETRIES']
+    timeout_seconds = app.config['TTS_CHUNK_TIMEOUT']
+    last_error = None
+
+    for backend in backends:
+        for attempt in range(max_retries + 1):
+            if attempt > 0:
+                # Exponential backoff with full jitter, so that retries from
+                # many chunks do not hit the backend in lockstep
+                delay = random.uniform(0, min(app.config['TTS_BACKOFF_MAX'],
+                                              app.config['TTS_BACKOFF_BASE'] * 2 ** (attempt - 1)))
+                logger.info("Retry %d/%d for chunk %d on %s in %.1fs", attempt, max_retries, index, backend.name, delay)
+                await asyncio.sleep(delay)
+            try:
+                data = await backend.synthesize(text, voice, app.config['TTS_RATE'], timeout_seconds)
+                segment_cache.put_bytes(segment_key(text, voice, backend), data)
+                if on_fallback and backend is not backends[0]:
+                    on_fallback(backend)
+                return data
+            except (CircuitOpenError, RateLimitedError) as e:
+                # The backend is shedding load, go straight to the next one
+                last_error = e
+                logger.warning(f"Chunk {index} skipped {backend.name}: {str(e)}")
                 break
-            else:
-                logger.error(f"Failed to generate audio on attempt {retry+1}/{max_retries+1}")
-        except Exception as e:
-            logger.error(f"Error in text processing, retry {retry}/{max_retries}: {str(e)}", exc_info=True)
-    
-    if not success:
-        logger.error("All attempts to generate audio failed")
+            except Exception as e:
+                if isinstance(e, TimeoutError):
+                    e = Exception(f"Timed out after {timeout_seconds} seconds")
+                last_error = e
+                logger.warning(f"Chunk {index} failed on {backend.name}, attempt "
+                               f"{attempt+1}/{max_retries+1}: {str(e)}")
+        if backend is not backends[-1]:
+            logger.warning(f"Chunk {index} failing over from {backend.name}")
+
+    raise Exception(f"Chunk {index} failed after {max_retries+1} attempts per backend: {last_error}")
+
+def iter_text_chunks(pieces, max_chars=None):
+    """Turn a stream of text pieces (e.g. PDF pages) into synthesis chunks.
+
+    Only a small carry-over buffer is kept between pieces, so memory use does
+    not depend on the length of the document.
+
+    Args:
+        pieces: Iterable of text pieces in document order, already cleaned
+            up like the pages yielded by iter_pdf_pages
+        max_chars (int): Target maximum chunk length in characters
+
+    Yields:
+        str: Non-empty text chunks in document order
+    """
+    if max_chars is None:
+        max_chars = app.config['TTS_CHUNK_CHARS']
+
+    buffer = ''
+    for piece in pieces:
+        if not piece:
+            continue
+        buffer = buffer + '\n\n' + piece if buffer else piece
+        if len(buffer) < 2 * max_chars:
+            continue
+        chunks = split_text_into_chunks(buffer, max_chars)
+        # The last chunk may continue on the next piece, keep it in the buffer
+        buffer = chunks.pop() if chunks else ''
+        yield from chunks
+
+    if buffer:
+        yield from split_text_into_chunks(buffer, max_chars)
+
+# Layer III bitrates in kbit/s by bitrate index: MPEG-1, and MPEG-2 / 2.5
+MP3_BITRATES = {
+    'mpeg1': (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    'mpeg2': (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+# Sample rates by the version bits of the header (1 is reserved)
+MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+def mp3_frame(data, offset):
+    """Parse the MPEG audio Layer III frame header at offset.
+
+    Returns (frame length in bytes, duration in seconds), or None if there is
+    no valid header at offset.
+    """
+    if offset + 4 > len(data) or data[offset] != 0xFF or data[offset + 1] & 0xE0 != 0xE0:
+        return None
+    version = (data[offset + 1] >> 3) & 3
+    layer = (data[offset + 1] >> 1) & 3
+    bitrate_index = data[offset + 2] >> 4
+    rate_index = (data[offset + 2] >> 2) & 3
+    padding = (data[offset + 2] >> 1) & 1
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    sample_rate = MP3_SAMPLE_RATES[version][rate_index]
+    bitrate = MP3_BITRATES['mpeg1' if version == 3 else 'mpeg2'][bitrate_index] * 1000
+    samples = 1152 if version == 3 else 576
+    return samples // 8 * bitrate // sample_rate + padding, samples / sample_rate
+
+class OutputFormatError(Exception):
+    """Raised for an output format or bitrate the server cannot produce."""
+
+class TranscodeError(Exception):
+    pass
+
+class AudioSink:
+    """Last stage of the synthesis pipeline: stores the MP3 stream in an output format.
+
+    Synthesized audio is passed to write() in document order as it becomes
+    ready, so a sink must work incrementally. Output goes to a temporary
+    location and close() moves it into place; abort() removes it.
+
+    The classmethods locate the finished output of a job: location() is
+    where it is written, lookup() returns it (and marks it as recently used)
+    once complete, register() records it in the cache after a job.
+
+    degraded is set by process_text_in_chunks when some of the audio came
+    from a fallback backend, in which case the output must not be cached as
+    the audio of its text: close() then puts it at fallback_path instead of
+    path, before the output is complete, so that a lookup of the text's
+    cache key never finds it.
+    """
+
+    name = None
+    extension = None
+    mimetype = None
+    # Bitrates (kbit/s) a request may choose from, None when fixed
+    bitrates = None
+
+    def __init__(self, path):
+        self.path = path
+        self.part_path = path + '.part'
+        self.bytes_written = 0
+        self.degraded = False
+        self.fallback_path = None
+
+    @staticmethod
+    def available():
+        return True
+
+    @classmethod
+    def cache(cls):
+        return audio_cache
+
+    @classmethod
+    def location(cls, audio_id):
+        return cls.cache().path_for(audio_id)
+
+    @classmethod
+    def lookup(cls, audio_id):
+        return cls.cache().get(audio_id)
+
+    @classmethod
+    def register(cls, audio_id):
+        cls.cache().add(audio_id)
+
+    async def open(self):
+        raise NotImplementedError
+
+    async def write(self, data):
+        raise NotImplementedError
+
+    async def close(self):
+        raise NotImplementedError
+
+    async def abort(self):
+        raise NotImplementedError
+
+    def _settle(self):
+        """Switch to fallback_path if the audio is degraded. Called by close()."""
+        if self.degraded and self.fallback_path:
+            self.path = self.fallback_path
+
+    def size(self):
+        """Size of the finished output in bytes."""
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+class Mp3Sink(AudioSink):
+    """The upstream MP3, written to a file unchanged."""
+
+    name = 'mp3'
+    extension = '.mp3'
+    mimetype = 'audio/mpeg'
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._file = None
+
+    async def open(self):
+        self._file = open(self.part_path, 'wb')
+
+    async def write(self, data):
+        self._file.write(data)
+        self.bytes_written += len(data)
+
+    async def close(self):
+        self._file.close()
+        self._settle()
+        os.replace(self.part_path, self.path)
+
+    async def abort(self):
+        if self._file is not None:
+            self._file.close()
+        if os.path.exists(self.part_path):
+            os.remove(self.part_path)
+
+class OpusSink(AudioSink):
+    """Ogg Opus at a speech bitrate, transcoded by an ffmpeg process as audio arrives.
+
+    ffmpeg reads the MP3 stream on stdin and writes the .part file itself, so
+    transcoding overlaps synthesis and the file can be streamed while it grows.
+    """
+
+    name = 'opus'
+    extension = '.ogg'
+    mimetype = 'audio/ogg; codecs=opus'
+    bitrates = app.config['OPUS_BITRATES']
+
+    def __init__(self, path, bitrate=None):
+        super().__init__(path)
+        self.bitrate = bitrate or app.config['OPUS_BITRATE']
+        self._process = None
+
+    @staticmethod
+    def available():
+        return shutil.which('ffmpeg') is not None
+
+    @classmethod
+    def cache(cls):
+        return opus_cache
+
+    async def open(self):
+        self._process = await asyncio.create_subprocess_exec(
+            shutil.which('ffmpeg'), '-loglevel', 'error', '-y', '-f', 'mp3', '-i', 'pipe:0',
+            '-ac', '1', '-c:a', 'libopus', '-b:a', f"{self.bitrate}k", '-application', 'voip',
+            '-f', 'ogg', self.part_path,
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE)
+
+    async def _error(self):
+        stderr = await self._process.stderr.read()
+        return TranscodeError(f"ffmpeg exited with status {await self._process.wait()}: "
+                              f"{stderr.decode(errors='replace').strip()}")
+
+    async def write(self, data):
+        try:
+            self._process.stdin.write(data)
+            await self._process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            raise await self._error()
+        self.bytes_written += len(data)
+
+    async def close(self):
+        self._process.stdin.close()
+        if await self._process.wait() != 0:
+            raise await self._error()
+        self._settle()
+        os.replace(self.part_path, self.path)
+
+    async def abort(self):
+        if self._process is not None and self._process.returncode is None:
+            self._process.kill()
+            await self._process.wait()
+        if os.path.exists(self.part_path):
+            os.remove(self.part_path)
+
+class HlsSink(AudioSink):
+    """The MP3 cut at frame boundaries into segments of about HLS_SEGMENT_SECONDS.
+
+    Segments and an m3u8 playlist are written to a directory per job. The
+    playlist is rewritten after every segment, so players can start on the
+    first segment while the rest of the document is still being synthesized;
+    #EXT-X-ENDLIST marks it complete.
+    """
+
+    name = 'hls'
+    extension = ''  # the output is a directory
+    mimetype = 'application/vnd.apple.mpegurl'
+    PLAYLIST = 'index.m3u8'
+
+    def __init__(self, path, segment_seconds=None):
+        super().__init__(path)
+        self.segment_seconds = segment_seconds or app.config['HLS_SEGMENT_SECONDS']
+        self.segments = []  # (file name, seconds)
+        self._buffer = bytearray()
+        self._scanned = 0
+        self._seconds = 0.0
+
+    @classmethod
+    def cache(cls):
+        return None
+
+    @classmethod
+    def location(cls, audio_id):
+        return os.path.join(app.config['AUDIO_FOLDER'], 'hls', audio_id)
+
+    @classmethod
+    def complete(cls, path):
+        try:
+            with open(os.path.join(path, cls.PLAYLIST), 'rb') as f:
+                f.seek(max(0, os.fstat(f.fileno()).st_size - 32))
+                return f.read().rstrip().endswith(b'#EXT-X-ENDLIST')
+        except OSError:
+            return False
+
+    @classmethod
+    def lookup(cls, audio_id):
+        path = cls.location(audio_id)
+        if not cls.complete(path):
+            return None
+        # The playlist's modification time is what the reaper ages the directory by
+        os.utime(os.path.join(path, cls.PLAYLIST))
+        return path
+
+    @classmethod
+    def register(cls, audio_id):
+        pass
+
+    def _write_atomic(self, name, data):
+        path = os.path.join(self.path, name)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _write_playlist(self, ended=False):
+        lines = ['#EXTM3U', '#EXT-X-VERSION:3',
+                 f"#EXT-X-TARGETDURATION:{int(self.segment_seconds) + 1}",
+                 '#EXT-X-MEDIA-SEQUENCE:0', '#EXT-X-PLAYLIST-TYPE:EVENT']
+        for name, seconds in self.segments:
+            lines.append(f"#EXTINF:{seconds:.3f},")
+            lines.append(name)
+        if ended:
+            lines.append('#EXT-X-ENDLIST')
+        self._write_atomic(self.PLAYLIST, ('\n'.join(lines) + '\n').encode('utf-8'))
+
+    def _cut(self, end):
+        name = f"{len(self.segments):05d}.mp3"
+        self._write_atomic(name, bytes(self._buffer[:end]))
+        self.segments.append((name, self._seconds))
+        self.bytes_written += end
+        del self._buffer[:end]
+        self._scanned = 0
+        self._seconds = 0.0
+        self._write_playlist()
+
+    async def open(self):
+        # Start from scratch if an earlier attempt left a partial directory
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.makedirs(self.path)
+
+    async def write(self, data):
+        # Segments must start on a frame, so the ID3 tag of the first chunk goes too
+        self._buffer += strip_id3_tag(data)
+        buffer = self._buffer
+        while True:
+            frame = mp3_frame(buffer, self._scanned)
+            if frame is None:
+                if len(buffer) - self._scanned < 4:
+                    break
+                # Not a frame header: keep the byte and look for the next frame
+                self._scanned += 1
+                continue
+            length, seconds = frame
+            if self._scanned + length > len(buffer):
+                break
+            self._scanned += length
+            self._seconds += seconds
+            if self._seconds >= self.segment_seconds:
+                self._cut(self._scanned)
+
+    async def close(self):
+        if self._buffer:
+            self._cut(len(self._buffer))
+        path = self.path
+        self._settle()
+        if self.path != path:
+            # Move the directory before the playlist is marked complete
+            shutil.rmtree(self.path, ignore_errors=True)
+            os.replace(path, self.path)
+        self._write_playlist(ended=True)
+
+    async def abort(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def size(self):
+        return directory_size(self.path)
+
+def directory_size(path):
+    try:
+        return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+    except OSError:
+        return 0
+
+OUTPUT_SINKS = {sink.name: sink for sink in (Mp3Sink, OpusSink, HlsSink)}
+
+def parse_output(fmt=None, bitrate=None):
+    """Validate a requested output format and bitrate.
+
+    Returns the output profile as a dict with the 'format' and, for formats
+    with a choice of bitrates, the 'bitrate' in kbit/s.
+
+    Raises:
+        OutputFormatError: With a message for the client
+    """
+    fmt = (fmt or app.config['DEFAULT_OUTPUT_FORMAT']).lower()
+    sink_class = OUTPUT_SINKS.get(fmt)
+    if sink_class is None:
+        raise OutputFormatError(f"Unknown output format '{fmt}', choose one of: {', '.join(OUTPUT_SINKS)}")
+    if not sink_class.available():
+        raise OutputFormatError(f"The {fmt} output format is not available on this server")
+    output = {'format': fmt}
+    if sink_class.bitrates:
+        try:
+            output['bitrate'] = int(bitrate or app.config['OPUS_BITRATE'])
+        except (TypeError, ValueError):
+            output['bitrate'] = None
+        if output['bitrate'] not in sink_class.bitrates:
+            raise OutputFormatError(f"Bitrate for {fmt} must be one of "
+                                    f"{', '.join(map(str, sink_class.bitrates))} kbit/s")
+    elif bitrate:
+        raise OutputFormatError(f"The bitrate of {fmt} output cannot be changed")
+    return output
+
+def output_tag(output):
+    """Short name of an output profile, as used in cache keys: 'mp3', 'opus-24k', 'hls'."""
+    if output.get('bitrate'):
+        return f"{output['format']}-{output['bitrate']}k"
+    return output['format']
+
+def create_audio_sink(output, path):
+    options = {key: value for key, value in output.items() if key != 'format'}
+    return OUTPUT_SINKS[output['format']](path, **options)
+
+async def process_text_in_chunks(text, voice, output, backends=None, on_progress=None,
+                                 semaphore=None):
+    """Process text for speech synthesis.
+
+    The text is split at sentence and paragraph boundaries and the chunks are
+    synthesized concurrently (bounded by TTS_CONCURRENCY). Audio is passed to
+    the output sink in document order as soon as each chunk is ready, and
+    only a small window of chunks is in flight at any time, so documents of
+    any length are processed in constant memory.
+
+    The sink writes to a temporary location (output_path + '.part' for an
+    MP3 file) and moves the output into place once the whole document has
+    been synthesized. sink.degraded is set when any chunk came from a
+    fallback backend.
+
+    Args:
+        text: The text to convert to speech, either a string or an iterable
+            of text pieces such as the pages yielded by iter_pdf_pages
+        voice (str): The voice to use
+        output: Path where the MP3 file should be saved, or an AudioSink
+            for other output formats
+        backends (list): TTSBackend instances in order of preference,
+            defaults to the configured tts_backends
+        on_progress: Optional callable receiving a dict with 'chunks_done',
+            'chars_done' and 'bytes_written' after each chunk is written
+        semaphore: Optional asyncio.Semaphore shared between documents, to run
+            several documents under one concurrency budget
+
+    Returns:
+        str: Path of the output if successful, False otherwise
+    """
+    sink = output if isinstance(output, AudioSink) else Mp3Sink(output)
+    if isinstance(text, str):
+        logger.info(f"Processing text for audio generation, length: {len(text)} characters")
+        chunk_iter = iter(split_text_into_chunks(text))
+        next_chunk = lambda: next(chunk_iter, None)
+    else:
+        logger.info("Processing streamed text for audio generation")
+        chunk_iter = iter_text_chunks(text)
+        loop = asyncio.get_running_loop()
+        # Pulling the next piece may parse a PDF page, keep that off the event loop
+        next_chunk = lambda: loop.run_in_executor(None, next, chunk_iter, None)
+
+    concurrency = app.config['TTS_CONCURRENCY']
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(concurrency)
+    # Chunks synthesized ahead of the one being written are held in memory,
+    # so cap the window to keep memory flat
+    max_in_flight = concurrency * 2
+
+    def on_fallback(backend):
+        sink.degraded = True
+
+    async def run_chunk(index, chunk_text):
+        async with semaphore:
+            return len(chunk_text), await synthesize_chunk(chunk_text, voice, index, backends, on_fallback)
+
+    pending = collections.deque()
+    chunk_count = 0
+    chunks_done = 0
+    chars_done = 0
+    total_bytes = 0
+    exhausted = False
+    try:
+        await sink.open()
+        while True:
+            while not exhausted and len(pending) < max_in_flight:
+                chunk_text = next_chunk()
+                if asyncio.isfuture(chunk_text):
+                    chunk_text = await chunk_text
+                if chunk_text is None:
+                    exhausted = True
+                    break
+                pending.append(asyncio.create_task(run_chunk(chunk_count, chunk_text)))
+                chunk_count += 1
+
+            if not pending:
+                break
+
+            chunk_chars, data = await pending.popleft()
+            if total_bytes:
+                data = strip_id3_tag(data)
+            await sink.write(data)
+            total_bytes += len(data)
+            chunks_done += 1
+            chars_done += chunk_chars
+            if on_progress:
+                on_progress({'chunks_done': chunks_done, 'chars_done': chars_done,
+                             'bytes_written': total_bytes})
+
+        if chunk_count == 0:
+            logger.error("No text to synthesize")
+            await sink.abort()
+            return False
+        await sink.close()
+    except Exception as e:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        logger.error(f"All attempts to generate audio failed: {str(e)}")
+        await sink.abort()
         return False
-    
-    return output_path
+
+    logger.info(f"Successfully generated {sink.name} audio at {sink.path} from {chunk_count} chunks, "
+                f"size: {sink.size()} bytes")
+    return sink.path
 
 async def _generate_speech(text, voice, output_path):
     """Internal function to generate speech using Edge TTS.
@@ -304,7 +3267,7 @@ async def _generate_speech(text, voice, output_path):
     Note: Kept for backward compatibility, now delegates to generate_speech_full.
     """
     try:
-        logger.debug(f"Generating speech using _generate_speech (delegating to generate_speech_full)")
+        logger.debug("Generating speech using _generate_speech (delegating to generate_speech_full)")
         result = await generate_speech_full(text, voice, output_path)
         if result:
             return True
@@ -314,75 +3277,592 @@ async def _generate_speech(text, voice, output_path):
         logger.error(f"Error in _generate_speech: {str(e)}", exc_info=True)
         raise
 
+Gauge('pdftovoice_queue_depth', 'Audio jobs waiting for a worker', function=lambda: scheduler.stats()['queued'])
+Gauge('pdftovoice_active_jobs', 'Audio jobs being processed', function=lambda: scheduler.stats()['active'])
+Counter('pdftovoice_jobs_rejected_total', 'Audio jobs rejected because the queue was full',
+        function=lambda: scheduler.stats()['rejected'])
+CACHES = {'documents': audio_cache, 'opus': opus_cache, 'segments': segment_cache, 'text': text_cache,
+          'manifests': manifest_cache}
+Counter('pdftovoice_cache_hits_total', 'Cache lookups that found an entry', ['cache'],
+        function=lambda: {(name,): cache.hits for name, cache in CACHES.items()})
+Counter('pdftovoice_cache_misses_total', 'Cache lookups that found nothing', ['cache'],
+        function=lambda: {(name,): cache.misses for name, cache in CACHES.items()})
+Gauge('pdftovoice_cache_hit_ratio', 'Share of cache lookups that found an entry', ['cache'],
+      function=lambda: {(name,): cache.stats()['hit_ratio'] for name, cache in CACHES.items()})
+Gauge('pdftovoice_cache_bytes', 'Bytes held in each cache', ['cache'],
+      function=lambda: {(name,): cache.stats()['bytes'] for name, cache in CACHES.items()})
+Gauge('pdftovoice_tts_in_flight', 'TTS requests in flight', ['backend'],
+      function=lambda: {(b.name,): b.in_flight for b in tts_backends})
+Gauge('pdftovoice_tts_circuit_open', '1 while the backend circuit breaker is not closed', ['backend'],
+      function=lambda: {(b.name,): int(b.breaker.state != 'closed') for b in tts_backends})
+Counter('pdftovoice_reaper_reclaimed_bytes_total', 'Bytes removed by the disk reaper', ['reason'],
+        function=lambda: {(reason,): size for reason, size in reaper.stats()['bytes_reclaimed'].items()})
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Expose metrics in the Prometheus text format"""
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/scheduler-stats', methods=['GET'])
+def get_scheduler_stats():
+    """Report worker pool utilisation, queue depth and TTS backend load"""
+    stats = scheduler.stats()
+    stats['tts_backends'] = {backend.name: backend.stats() for backend in tts_backends}
+    return jsonify(stats)
+
+@app.route('/reaper-stats', methods=['GET'])
+def get_reaper_stats():
+    """Report what the disk reaper has removed and reclaimed"""
+    return jsonify(reaper.stats())
+
+@app.route('/cache-stats', methods=['GET'])
+def get_cache_stats():
+    """Report hit/miss counters and sizes of the audio and text caches"""
+    return jsonify({
+        'documents': audio_cache.stats(),
+        'opus': opus_cache.stats(),
+        'segments': segment_cache.stats(),
+        'text': text_cache.stats(),
+        'manifests': manifest_cache.stats(),
+    })
+
+def fallback_output_id(audio_id):
+    return f"{audio_id}-fallback"
+
+def output_id_for(audio_id, job=None):
+    """Id the output of an audio job is stored under.
+
+    Audio made partly by a fallback backend is kept under fallback_output_id,
+    out of reach of cache lookups, and the job record points at it.
+    """
+    if job is not None:
+        return job['progress'].get('output_id', audio_id)
+    return audio_id
+
+def output_sink_for(audio_id, job=None):
+    """Sink class of an audio job: from its record, or else from the files on disk."""
+    if job is not None and job['progress'].get('format') in OUTPUT_SINKS:
+        return OUTPUT_SINKS[job['progress']['format']]
+    for sink_class in OUTPUT_SINKS.values():
+        path = sink_class.location(audio_id)
+        if os.path.exists(path) or os.path.exists(path + '.part'):
+            return sink_class
+    return Mp3Sink
+
 @app.route('/audio/<audio_id>')
 def get_audio(audio_id):
-    audio_path = os.path.join(app.config['AUDIO_FOLDER'], f"{audio_id}.mp3")
-    logger.info(f"Audio request for: {audio_id}")
-    
+    """Serve a finished audio file, with Range support for seeking"""
+    audio_id = secure_filename(audio_id)
+    job = job_store.get(audio_id)
+    output_id = output_id_for(audio_id, job)
+    sink_class = output_sink_for(output_id, job)
+    audio_path = sink_class.location(output_id)
+    logger.debug("Audio request for: %s", audio_id)
+
+    if sink_class is HlsSink and os.path.isdir(audio_path):
+        return redirect(url_for('get_hls_file', audio_id=audio_id, name=HlsSink.PLAYLIST))
     if os.path.exists(audio_path):
-        logger.info(f"Serving audio file: {audio_path}, size: {os.path.getsize(audio_path)}")
-        # Send file with auto-cleanup
-        return send_file(audio_path, mimetype='audio/mp3', as_attachment=True, 
-                        download_name=f"pdf_audio_{audio_id}.mp3")
+        sink_class.cache().touch(output_id)
+        logger.debug("Serving audio file: %s", audio_path)
+        # conditional=True answers Range requests with 206 partial content
+        return send_file(audio_path, mimetype=sink_class.mimetype, conditional=True,
+                         as_attachment=request.args.get('download') == '1',
+                         download_name=f"pdf_audio_{audio_id}{sink_class.extension}")
     else:
         # Check status to provide more helpful error
-        if audio_id in JOB_STATUS:
-            status = JOB_STATUS[audio_id]['status']
-            if status == 'processing':
-                logger.info(f"Audio file {audio_id} is still processing")
+        if job:
+            status = job['status']
+            if status in ('queued', 'processing'):
+                logger.debug("Audio file %s is still processing", audio_id)
                 return jsonify({'error': 'Audio file is still being generated'}), 202
             elif status == 'failed':
-                error = JOB_STATUS[audio_id]['error'] or 'Unknown error'
+                error = job['error'] or 'Unknown error'
                 logger.error(f"Audio file {audio_id} generation failed: {error}")
                 return jsonify({'error': f'Audio generation failed: {error}'}), 500
         
         logger.error(f"Audio file not found: {audio_path}")
         return jsonify({'error': 'Audio file not found'}), 404
 
-def extract_text_from_pdf(pdf_path):
-    logger.info(f"Extracting text from PDF: {pdf_path}")
-    text = ""
-    try:
-        with open(pdf_path, 'rb') as file:
-            reader = PyPDF2.PdfReader(file)
-            num_pages = len(reader.pages)
-            logger.info(f"PDF has {num_pages} pages")
-            
+@app.route('/audio/<audio_id>/hls/<name>')
+def get_hls_file(audio_id, name):
+    """Serve the playlist or a segment of HLS output, also while it is being written"""
+    audio_id = secure_filename(audio_id)
+    job = job_store.get(audio_id)
+    path = os.path.join(HlsSink.location(output_id_for(audio_id, job)), secure_filename(name))
+    if not os.path.isfile(path):
+        if job and job['status'] in ('queued', 'processing'):
+            return jsonify({'error': 'Audio file is still being generated'}), 202
+        return jsonify({'error': 'Audio file not found'}), 404
+    if name == HlsSink.PLAYLIST:
+        # The playlist grows until the job is done, so players must re-fetch it
+        response = send_file(path, mimetype=HlsSink.mimetype, conditional=False)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    return send_file(path, mimetype=Mp3Sink.mimetype, conditional=True)
+
+@app.route('/audio/<audio_id>/manifest')
+def get_manifest(audio_id):
+    """Sections of a sectioned job, with the status and URL of each section's audio.
+
+    Available from the start of the job; sections can be played as soon as
+    they are completed.
+    """
+    audio_id = secure_filename(audio_id)
+    manifest = load_manifest(audio_id)
+    if manifest is None:
+        job = job_store.get(audio_id)
+        if job and job['status'] in ('queued', 'processing'):
+            return jsonify({'error': 'Audio file is still being generated'}), 202
+        return jsonify({'error': 'Manifest not found'}), 404
+
+    sink_class = OUTPUT_SINKS[manifest['format']]
+    for section in manifest['sections']:
+        if section['status'] != 'completed' or not section['audio_id']:
+            continue
+        if os.path.exists(sink_class.location(section['audio_id'])):
+            section['url'] = url_for('get_audio', audio_id=section['audio_id'])
+        else:
+            # Evicted since: submitting the document again synthesizes it anew
+            section['status'] = 'missing'
+    return jsonify(manifest)
+
+@app.route('/audio/<audio_id>/sections/<int:index>')
+def get_section_audio(audio_id, index):
+    """Redirect to the audio of one section of a sectioned job"""
+    manifest = load_manifest(secure_filename(audio_id))
+    if manifest is None or not 0 <= index < len(manifest['sections']):
+        return jsonify({'error': 'Section not found'}), 404
+    section = manifest['sections'][index]
+    if section['status'] != 'completed' or not section['audio_id']:
+        status = 202 if manifest['status'] == 'processing' and section['status'] == 'pending' else 404
+        return jsonify({'error': f"Section {index} is {section['status']}"}), status
+    return redirect(url_for('get_audio', audio_id=section['audio_id']))
+
+@app.route('/audio/<audio_id>/stream')
+def stream_audio(audio_id):
+    """Stream audio while it is being synthesized.
+
+    Audio is sent with chunked transfer encoding as soon as it is appended to
+    the job's .part file, so playback can start long before the whole
+    document is done. Once the job has finished this is equivalent to
+    downloading the complete file. HLS jobs are redirected to their playlist,
+    which serves the same purpose.
+    """
+    audio_id = secure_filename(audio_id)
+    job = job_store.get(audio_id)
+    sink_class = output_sink_for(audio_id, job)
+    audio_path = sink_class.location(output_id_for(audio_id, job))
+    if job is None and not os.path.exists(audio_path):
+        return jsonify({'error': 'Audio file not found'}), 404
+    if job and job['status'] == 'failed':
+        return jsonify({'error': f"Audio generation failed: {job['error'] or 'Unknown error'}"}), 500
+    if sink_class is HlsSink:
+        return redirect(url_for('get_hls_file', audio_id=audio_id, name=HlsSink.PLAYLIST))
+
+    poll_interval = app.config['SSE_POLL_INTERVAL']
+    read_size = 64 * 1024
+
+    def open_audio():
+        # The .part file is renamed to the final path when the job finishes;
+        # an already open handle keeps reading the same (now complete) file
+        audio_path = sink_class.location(output_id_for(audio_id, job_store.get(audio_id)))
+        for path in (audio_path + '.part', audio_path):
+            try:
+                return open(path, 'rb')
+            except FileNotFoundError:
+                continue
+        return None
+
+    def frames():
+        f = open_audio()
+        while f is None:
+            job = job_store.get(audio_id)
+            if job is None or job['status'] == 'failed':
+                return
+            job_store.wait_for_change(poll_interval)
+            f = open_audio()
+
+        with f:
+            while True:
+                data = f.read(read_size)
+                if data:
+                    yield data
+                    continue
+                job = job_store.get(audio_id)
+                if job is None or job['status'] in ('completed', 'failed'):
+                    # Pick up anything written between the last read and completion
+                    data = f.read()
+                    if data:
+                        yield data
+                    return
+                job_store.wait_for_change(poll_interval)
+
+    return Response(stream_with_context(frames()), mimetype=sink_class.mimetype, headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+
+# Reader reused across batches inside an extraction worker process, so that
+# the cross-reference table and page tree are parsed once per document
+_worker_reader = {'key': None, 'file': None, 'reader': None}
+
+def _extract_page_range(pdf_path, start, stop):
+    """Extract the raw text of pages [start, stop) of a PDF.
+
+    Runs inside the extraction worker processes. Returns the page texts and
+    the time each page took, for the parent to record. Normalization needs
+    to see neighbouring pages and is done by the parent.
+    """
+    stat = os.stat(pdf_path)
+    key = (pdf_path, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+    if _worker_reader['key'] != key:
+        if _worker_reader['file'] is not None:
+            _worker_reader['file'].close()
+        file = open_pdf_file(pdf_path)
+        _worker_reader.update(key=key, file=file, reader=PyPDF2.PdfReader(file))
+    reader = _worker_reader['reader']
+
+    pages = []
+    seconds = []
+    for page_num in range(start, stop):
+        began = time.perf_counter()
+        pages.append(reader.pages[page_num].extract_text())
+        seconds.append(time.perf_counter() - began)
+        reader.resolved_objects.clear()
+    return pages, seconds
+
+_extract_pool = None
+_extract_pool_lock = threading.Lock()
+
+def get_extract_pool():
+    """Return the shared extraction process pool, or None if it is disabled or unavailable."""
+    global _extract_pool
+    with _extract_pool_lock:
+        if _extract_pool is None and app.config['EXTRACT_WORKERS'] > 1:
+            try:
+                # spawn rather than fork: this process runs threads (scheduler, request handlers)
+                _extract_pool = ProcessPoolExecutor(
+                    max_workers=app.config['EXTRACT_WORKERS'],
+                    mp_context=multiprocessing.get_context('spawn'))
+            except (OSError, NotImplementedError) as e:
+                # e.g. serverless runtimes without /dev/shm
+                logger.warning(f"Process pool unavailable, extracting serially: {e}")
+                app.config['EXTRACT_WORKERS'] = 1
+        return _extract_pool
+
+def _reset_extract_pool():
+    global _extract_pool
+    with _extract_pool_lock:
+        if _extract_pool is not None:
+            _extract_pool.shutdown(wait=False, cancel_futures=True)
+            _extract_pool = None
+
+def open_pdf_file(pdf_path):
+    """Open a PDF for reading, memory-mapped so the parser's many small
+    seeks and reads do not each cost a system call."""
+    with open(pdf_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return io.BytesIO()
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+def iter_pdf_pages(pdf_source, parallel=True):
+    """Yield the normalized text of each page of a PDF, in page order.
+
+    pdf_source is a path or a readable binary stream. Large documents given
+    by path are fanned out in batches across the extraction process pool.
+    Only a few batches are in flight at any time, so memory use does not grow
+    with the length of the document. See TextNormalizer for what is removed.
+    """
+    yield from TextNormalizer().normalize_pages(iter_raw_pdf_pages(pdf_source, parallel))
+
+def iter_raw_pdf_pages(pdf_source, parallel=True):
+    """Yield the text of each page of a PDF as PyPDF2 extracts it."""
+    pdf_path = pdf_source if isinstance(pdf_source, str) else None
+    with open_pdf_file(pdf_path) if pdf_path else contextlib.nullcontext(pdf_source) as stream:
+        reader = PyPDF2.PdfReader(stream)
+        num_pages = len(reader.pages)
+        logger.debug("PDF has %d pages", num_pages)
+
+        pool = None
+        if pdf_path and parallel and num_pages >= app.config['EXTRACT_PARALLEL_MIN_PAGES']:
+            pool = get_extract_pool()
+
+        if pool is None:
             for page_num in range(num_pages):
-                logger.debug(f"Processing page {page_num+1}/{num_pages}")
-                page = reader.pages[page_num]
-                page_text = page.extract_text()
-                text += page_text + "\n"
-                logger.debug(f"Page {page_num+1} extracted {len(page_text)} characters")
-        
-        # Apply minimal cleaning to preserve original text structure
-        cleaned_text = basic_text_cleanup(text)
-        logger.info(f"Extraction complete. Original text: {len(text)} chars, Cleaned text: {len(cleaned_text)} chars")
-        return cleaned_text
+                start = time.perf_counter()
+                page_text = reader.pages[page_num].extract_text()
+                EXTRACT_PAGE_SECONDS.observe(time.perf_counter() - start)
+                logger.debug("Page %d/%d extracted %d characters", page_num + 1, num_pages, len(page_text))
+                # PyPDF2 keeps every object it has parsed (content streams, fonts)
+                # for the lifetime of the reader. Drop them so memory stays flat on
+                # long documents; anything needed again is re-read from the file.
+                reader.resolved_objects.clear()
+                yield page_text
+            return
+
+    batch = app.config['EXTRACT_BATCH_PAGES']
+    max_in_flight = app.config['EXTRACT_WORKERS'] * 2
+    batches = iter(range(0, num_pages, batch))
+    pending = collections.deque()
+    try:
+        while True:
+            while len(pending) < max_in_flight:
+                start = next(batches, None)
+                if start is None:
+                    break
+                pending.append(pool.submit(_extract_page_range, pdf_path, start, min(start + batch, num_pages)))
+            if not pending:
+                break
+            pages, seconds = pending.popleft().result()
+            for elapsed in seconds:
+                EXTRACT_PAGE_SECONDS.observe(elapsed)
+            yield from pages
+    except BrokenProcessPool:
+        _reset_extract_pool()
+        raise
+    finally:
+        for future in pending:
+            future.cancel()
+
+def extract_text_from_pdf(pdf_source):
+    logger.info(f"Extracting text from PDF: {pdf_source if isinstance(pdf_source, str) else 'upload stream'}")
+    try:
+        # Pages are cleaned as they are extracted; joining the list is linear
+        # in the size of the document
+        pages = list(iter_pdf_pages(pdf_source))
+        text = "\n".join(page for page in pages if page)
+        logger.info(f"Extraction complete. {len(pages)} pages, {len(text)} chars")
+        return text
     except Exception as e:
         logger.error(f"Error extracting text from PDF: {str(e)}", exc_info=True)
         raise
 
+MULTIPLE_SPACES_RE = re.compile(r' {2,}')
+MULTIPLE_BREAKS_RE = re.compile(r'\n{3,}')
+
 def basic_text_cleanup(text):
-    """Apply minimal cleanup to preserve original text structure."""
-    import re
-    
-    # Replace multiple consecutive spaces with a single space
-    text = re.sub(r' {2,}', ' ', text)
-    
-    # Replace tabs with a single space
-    text = text.replace('\t', ' ')
-    
-    # Replace multiple consecutive line breaks with two line breaks (paragraph separation)
-    text = re.sub(r'\n{3,}', '\n\n', text)
-    
-    # Normalize all line endings
-    text = re.sub(r'\r\n?', '\n', text)
-    
-    # Final trim
-    text = text.strip()
-    
-    return text
+    """Apply minimal cleanup to preserve original text structure.
+
+    Each step is guarded by a substring test, which is much cheaper than the
+    regex scan it skips; most pages need none of them.
+    """
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    if '\t' in text:
+        text = text.replace('\t', ' ')
+    if '  ' in text:
+        text = MULTIPLE_SPACES_RE.sub(' ', text)
+    if '\n\n\n' in text:
+        text = MULTIPLE_BREAKS_RE.sub('\n\n', text)
+    return text.strip()
+
+_dictionary = None
+
+def english_words():
+    """Return the set of known English words, loaded on first use.
+
+    The word list is the frequency dictionary shipped with symspellpy. Without
+    it the set is empty and callers fall back to not consulting it.
+    """
+    global _dictionary
+    if _dictionary is None:
+        try:
+            import symspellpy
+            path = os.path.join(os.path.dirname(symspellpy.__file__), 'frequency_dictionary_en_82_765.txt')
+            with open(path, encoding='utf-8') as f:
+                _dictionary = frozenset(line.split(' ', 1)[0] for line in f)
+        except (ImportError, OSError) as e:
+            logger.warning(f"No English word list available, hyphenated line ends are always joined: {e}")
+            _dictionary = frozenset()
+    return _dictionary
+
+class TextNormalizer:
+    """Turn the text of consecutive PDF pages into clean prose for synthesis.
+
+    Per page, in a single pass over its lines:
+    - collapses whitespace and normalizes line endings
+    - drops page numbers ("12", "Page 12", "12 of 40", "- 12 -", "xii") from
+      the top and bottom of the page; years and capital roman numerals are kept
+    - drops running headers and footers: lines at the top or bottom of a page
+      that also appear at the edge of neighbouring pages verbatim, and short
+      lines with a page number set off at one end ("Annual report | 12") that
+      appear in the same position with different numbers on more pages.
+      Numbered headings such as "Chapter 2" are kept
+    - rejoins words hyphenated across line ends, unless the joined word is
+      not a known word ("well-known" stays hyphenated)
+    - rejoins lines wrapped in the middle of a paragraph, keeping a paragraph
+      break after a short line that ends a sentence and at blank lines, and a
+      line break before list items
+
+    Pages are processed as a stream with a lookahead of WINDOW pages, which
+    is what running headers are compared against.
+    """
+
+    WINDOW = 3
+    EDGE_LINES = 2
+    MIN_REPEATS = 2
+    # Lines that only match with their numbers masked need more pages
+    NUMBERED_MIN_REPEATS = 3
+    # A line shorter than this share of the page's longest line that ends a
+    # sentence is taken to end its paragraph
+    SHORT_LINE = 0.75
+
+    WHITESPACE = str.maketrans('\t\f\v\u00a0', '    ')
+    DIGITS_RE = re.compile(r'\d+')
+    # Roman numerals only in lower case, so that "I" or "X" alone are kept
+    PAGE_NUMBER_RE = re.compile(
+        r'(?:(?:[Pp]age|PAGE)\s+)?(?:(?!(?:19|20)\d\d$)\d{1,4}|[ivx]{1,6})(?:\s*(?:/|of)\s*\d{1,4})?'
+        r'|[-\u2013\u2014]\s*\d{1,4}\s*[-\u2013\u2014]')
+    PAGE_NUMBER_CHARS = 20
+    # A running header or footer with the page number at one end, once its
+    # numbers are masked: "Report | #", "# - Report", "Report, page #"
+    NUMBERED_EDGE_RE = re.compile(
+        r'(?:.*(?:[|\u2022\u00b7,:/\u2013\u2014-]|[Pp]age|PAGE)\s*#(?:\s*(?:/|of)\s*#)?'
+        r'|(?:[Pp]age\s+|PAGE\s+)?#(?:\s*(?:/|of)\s*#)?\s*[|\u2022\u00b7:\u2013\u2014-].*)')
+    NUMBERED_EDGE_CHARS = 60
+    WORD_RE = re.compile(r'[^\W\d_]+')
+    LIST_ITEM_RE = re.compile(r'(?:[-\u2022\u2013*\u00b7\u25aa]|\(?\d{1,3}[.)]|\(?[a-z][.)])\s')
+    SENTENCE_END = ('.', '!', '?', ':', '"', '\u201d', '\u2019', ')', '\u2026')
+
+    def __init__(self):
+        self._before = collections.deque(maxlen=self.WINDOW)  # edge keys of emitted pages
+        self._after = collections.deque()  # (lines, {edge index: keys}, edge keys) of pages not yet emitted
+
+    def _lines(self, text):
+        # Each check is a fast scan, translate() is not
+        if '\t' in text or '\f' in text or '\v' in text or not text.isascii():
+            text = text.translate(self.WHITESPACE)
+        if '  ' in text:
+            text = MULTIPLE_SPACES_RE.sub(' ', text)
+        lines = [line.strip() for line in text.splitlines()]
+        if '' in lines:
+            # Drop leading blank lines and keep one of each run of blank lines
+            lines = [line for i, line in enumerate(lines) if line or (i and lines[i - 1])]
+        return lines
+
+    def _page(self, text):
+        """Split a page into lines and find the keys of its edge lines.
+
+        The edge lines are the first and last EDGE_LINES non-empty lines. Each
+        is matched on neighbouring pages by its text and, if it looks like a
+        numbered running header, by its position with the numbers masked:
+        (0, 'Report | #') for the first line, (-1, ...) for the last. The
+        text key comes first. Returns the lines, {line index: keys} and the
+        set of all keys of the page.
+        """
+        lines = self._lines(text)
+        filled = [i for i, line in enumerate(lines) if line]
+        positions = {}
+        for position, i in enumerate(filled[:self.EDGE_LINES]):
+            positions[i] = (position,)
+        for position, i in enumerate(filled[:-self.EDGE_LINES - 1:-1], 1):
+            positions[i] = positions.get(i, ()) + (-position,)
+
+        # Scanning with a regex is slow next to a substring search, so only
+        # mask numbers when there are any, in one call for all edge lines
+        edge_text = '\n'.join(lines[i] for i in positions)
+        if any(digit in edge_text for digit in '0123456789'):
+            edge_text = self.DIGITS_RE.sub('#', edge_text)
+        masked = edge_text.split('\n')
+        edges = {}
+        page_keys = set()
+        for (i, line_positions), numbered in zip(positions.items(), masked):
+            keys = ((lines[i],),)
+            if (numbered != lines[i] and len(numbered) <= self.NUMBERED_EDGE_CHARS
+                    and self.NUMBERED_EDGE_RE.fullmatch(numbered)):
+                keys += tuple((position, numbered) for position in line_positions)
+            edges[i] = keys
+            page_keys.update(keys)
+        return lines, edges, page_keys
+
+    def _emit(self):
+        lines, edges, page_keys = self._after.popleft()
+        neighbours = list(self._before)
+        neighbours.extend(other for _, _, other in itertools.islice(self._after, self.WINDOW))
+        self._before.append(page_keys)
+
+        dropped = []
+        for i, keys in edges.items():
+            line = lines[i]
+            if len(line) <= self.PAGE_NUMBER_CHARS and self.PAGE_NUMBER_RE.fullmatch(line):
+                dropped.append(i)
+                continue
+            text_key, numbered = keys[0], keys[1:]
+            repeats = verbatim = 0
+            for other in neighbours:
+                if text_key in other:
+                    verbatim += 1
+                elif not numbered or other.isdisjoint(numbered):
+                    continue
+                repeats += 1
+                if verbatim == self.MIN_REPEATS or repeats == self.NUMBERED_MIN_REPEATS:
+                    dropped.append(i)
+                    break
+        if dropped:
+            lines = [line for i, line in enumerate(lines) if i not in dropped]
+        return self._join(lines)
+
+    def _join(self, lines):
+        width = max(map(len, lines), default=0)
+        paragraphs = []
+        current = ''
+        previous = ''
+        for line in lines:
+            if not line:
+                if current:
+                    paragraphs.append(current)
+                current = previous = ''
+                continue
+            if not current:
+                current = line
+            elif current[-1] == '-' and len(current) > 1 and current[-2].isalpha() and line[0].islower():
+                current = current[:-1] + line if self._joins(current, line) else current + line
+            elif self.LIST_ITEM_RE.match(line):
+                current = f"{current}\n{line}"
+            elif previous.endswith(self.SENTENCE_END) and len(previous) < width * self.SHORT_LINE:
+                paragraphs.append(current)
+                current = line
+            else:
+                current = f"{current} {line}"
+            previous = line
+        if current:
+            paragraphs.append(current)
+        return '\n\n'.join(paragraphs)
+
+    def _joins(self, current, line):
+        """Whether a word hyphenated at the end of current is one word split across lines."""
+        words = english_words()
+        if not words:
+            return True
+        # current is the paragraph so far, so only look at its last word
+        prefix = self.WORD_RE.findall(current.rsplit(None, 1)[-1])[-1]
+        return (prefix + self.WORD_RE.match(line).group()).lower() in words
+
+    def feed(self, text):
+        """Add the next page. Returns the pages that are ready, in order."""
+        self._after.append(self._page(text))
+        ready = []
+        while len(self._after) > self.WINDOW:
+            ready.append(self._emit())
+        return ready
+
+    def finish(self):
+        """Return the remaining pages once the document has ended."""
+        ready = []
+        while self._after:
+            ready.append(self._emit())
+        return ready
+
+    def normalize_pages(self, pages):
+        for text in pages:
+            yield from self.feed(text)
+        yield from self.finish()
+
+@app.errorhandler(413)
+def upload_too_large(e):
+    limit_mb = app.config['MAX_CONTENT_LENGTH'] / 1024**2
+    logger.warning(f"Rejected upload larger than {limit_mb:.0f} MB")
+    return jsonify({'error': f'File is too large. The maximum upload size is {limit_mb:.0f} MB.'}), 413
 
 # Error handler for all 500 errors
 @app.errorhandler(500)
@@ -395,7 +3875,10 @@ def server_error(e):
     }), 500
 
 async def generate_speech_full(text, voice, output_path):
-    """Generate speech for the entire text directly without chunking.
+    """Generate speech for the entire text.
+    
+    Note: Kept for backward compatibility, now delegates to the chunked
+    engine in process_text_in_chunks.
     
     Args:
         text (str): The text to convert to speech
@@ -406,50 +3889,9 @@ async def generate_speech_full(text, voice, output_path):
         bool: True if successful, False otherwise
     """
     try:
-        logger.info(f"Generating speech for text of length {len(text)} using Edge TTS directly")
-        
-        # Create communicate object with voice and rate settings
-        communicate = edge_tts.Communicate(text, voice, rate="+25%")
-        
-        # Open the output file directly
-        with open(output_path, "wb") as file:
-            audio_chunk_count = 0
-            total_bytes = 0
-            
-            # Set longer timeout for full text processing
-            timeout_seconds = max(30, min(300, len(text) // 50))
-            logger.debug(f"Using timeout of {timeout_seconds} seconds based on text length")
-            
-            try:
-                async with asyncio.timeout(timeout_seconds):
-                    async for chunk in communicate.stream():
-                        if chunk["type"] == "audio":
-                            file.write(chunk["data"])
-                            total_bytes += len(chunk["data"])
-                            audio_chunk_count += 1
-                            
-                            # Log progress for large texts
-                            if audio_chunk_count % 50 == 0:
-                                logger.debug(f"Processed {audio_chunk_count} audio chunks, {total_bytes} bytes")
-            except asyncio.TimeoutError:
-                logger.warning(f"Timeout after processing {audio_chunk_count} chunks. Using partial results.")
-                if audio_chunk_count == 0:
-                    raise Exception("TTS processing timed out without generating any audio")
-        
-        # Verify the output file
-        if not os.path.exists(output_path):
-            logger.error("Output file was not created")
-            return False
-            
-        file_size = os.path.getsize(output_path)
-        logger.info(f"Generated audio file: {output_path}, size: {file_size} bytes")
-        
-        if file_size == 0:
-            logger.error("Generated audio file is empty")
-            return False
-            
-        return True
-        
+        with span('generate_speech_full'):
+            result = await process_text_in_chunks(text, voice, output_path)
+        return bool(result)
     except Exception as e:
         logger.error(f"Error in generate_speech_full: {str(e)}", exc_info=True)
         return False
@@ -0,0 +1,208 @@
+"""Convert many PDFs to audio from the command line.
+
+Usage:
+    python batch_convert.py INPUT [INPUT ...] --out DIR [--voice en]
+                            [--format mp3] [--bitrate 24]
+                            [--documents 2] [--concurrency 8] [--json]
+
+INPUT may be PDF files or directories, which are searched recursively for
+*.pdf files. Each document is extracted page by page and synthesized as its
+pages arrive. All documents share one budget of concurrent TTS requests
+(--concurrency); --documents limits how many are in progress at once.
+--format opus writes Ogg Opus files (transcoded by ffmpeg as the audio is
+synthesized) and --format hls a directory of segments with an index.m3u8
+playlist per document.
+
+Progress is checkpointed to DIR/.batch-state.json after every document, so an
+interrupted run picks up where it left off when started again with the same
+output directory. Per-document results and aggregate throughput are printed
+at the end.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+
+import app
+
+
+STATE_FILE = '.batch-state.json'
+
+
+def find_pdfs(inputs):
+    """Expand files and directories into a sorted list of PDF paths."""
+    found = []
+    for path in inputs:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                found.extend(os.path.join(root, n) for n in names if n.lower().endswith('.pdf'))
+        elif path.lower().endswith('.pdf'):
+            found.append(path)
+        else:
+            print(f"Skipping {path}: not a PDF file or directory", file=sys.stderr)
+    return sorted(set(found))
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def output_name(pdf_path, used, extension='.mp3'):
+    """Pick <stem><extension>, adding a suffix when two inputs share a stem."""
+    stem = os.path.splitext(os.path.basename(pdf_path))[0]
+    name = f"{stem}{extension}"
+    n = 2
+    while name in used:
+        name = f"{stem}-{n}{extension}"
+        n += 1
+    used.add(name)
+    return name
+
+
+class BatchState:
+    """Per-document results, keyed by content hash and saved after every change."""
+
+    def __init__(self, out_dir):
+        self.path = os.path.join(out_dir, STATE_FILE)
+        try:
+            with open(self.path) as f:
+                self.documents = json.load(f)
+        except (OSError, ValueError):
+            self.documents = {}
+
+    def is_done(self, digest, output_path):
+        entry = self.documents.get(digest)
+        return bool(entry and entry['status'] == 'completed' and os.path.exists(output_path))
+
+    def record(self, digest, result):
+        self.documents[digest] = result
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.documents, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+async def convert_document(pdf_path, output_path, voice, semaphore, output):
+    """Extract and synthesize one PDF. Returns a result dict."""
+    chars = {'done': 0}
+
+    def on_progress(progress):
+        chars['done'] = progress['chars_done']
+
+    start = time.perf_counter()
+    try:
+        ok = await app.process_text_in_chunks(
+            app.iter_pdf_pages(pdf_path), voice, app.create_audio_sink(output, output_path),
+            on_progress=on_progress, semaphore=semaphore)
+        error = None if ok else 'Synthesis failed'
+    except Exception as e:
+        ok, error = False, str(e)
+    return {
+        'input': pdf_path,
+        'output': output_path,
+        'status': 'completed' if ok else 'failed',
+        'error': error,
+        'chars': chars['done'],
+        'seconds': round(time.perf_counter() - start, 2),
+    }
+
+
+async def run_batch(pdfs, out_dir, voice, documents, concurrency, on_result, output=None):
+    state = BatchState(out_dir)
+    output = output or {'format': 'mp3'}
+    extension = app.OUTPUT_SINKS[output['format']].extension
+    semaphore = asyncio.Semaphore(concurrency)
+    doc_slots = asyncio.Semaphore(documents)
+    used_names = set()
+    results = []
+
+    async def run_one(pdf_path, name):
+        digest = await asyncio.to_thread(file_digest, pdf_path)
+        output_path = os.path.join(out_dir, name)
+        if state.is_done(digest, output_path):
+            result = dict(state.documents[digest], status='skipped')
+        else:
+            async with doc_slots:
+                result = await convert_document(pdf_path, output_path, voice, semaphore, output)
+            state.record(digest, result)
+        results.append(result)
+        on_result(result)
+
+    try:
+        await asyncio.gather(*(run_one(p, output_name(p, used_names, extension)) for p in pdfs))
+    finally:
+        await app.close_tts_backends()
+    return results
+
+
+def summarize(results, elapsed):
+    converted = [r for r in results if r['status'] == 'completed']
+    chars = sum(r['chars'] for r in converted)
+    return {
+        'documents': len(results),
+        'completed': len(converted),
+        'skipped': sum(1 for r in results if r['status'] == 'skipped'),
+        'failed': sum(1 for r in results if r['status'] == 'failed'),
+        'seconds': round(elapsed, 2),
+        'docs_per_min': round(len(converted) * 60 / elapsed, 2) if elapsed > 0 else None,
+        'chars_per_sec': round(chars / elapsed, 1) if elapsed > 0 else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convert many PDFs to audio.')
+    parser.add_argument('inputs', nargs='+', help='PDF files or directories')
+    parser.add_argument('--out', required=True, help='directory for the audio files')
+    parser.add_argument('--voice', default='en', choices=sorted(app.VOICE_MAPPING),
+                        help='voice language (default: en)')
+    parser.add_argument('--format', choices=sorted(app.OUTPUT_SINKS),
+                        help=f"output format (default: {app.app.config['DEFAULT_OUTPUT_FORMAT']})")
+    parser.add_argument('--bitrate', type=int, help='bitrate in kbit/s, for opus output')
+    parser.add_argument('--documents', type=int, default=2,
+                        help='documents converted at the same time (default: 2)')
+    parser.add_argument('--concurrency', type=int, default=app.app.config['TTS_CONCURRENCY'] * 2,
+                        help='TTS requests in flight across all documents')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    parser.add_argument('-v', '--verbose', action='store_true', help='show progress logging')
+    args = parser.parse_args(argv)
+
+    app.logger.setLevel(logging.INFO if args.verbose else logging.WARNING)
+    try:
+        output = app.parse_output(args.format, args.bitrate)
+    except app.OutputFormatError as e:
+        parser.error(str(e))
+    os.makedirs(args.out, exist_ok=True)
+    pdfs = find_pdfs(args.inputs)
+    if not pdfs:
+        print("No PDF files found", file=sys.stderr)
+        return 1
+
+    def on_result(result):
+        if not args.json:
+            print(f"{result['status']:>9}  {result['seconds']:8.1f} s  {result['chars']:>9} chars  {result['input']}"
+                  + (f"  ({result['error']})" if result.get('error') else ''))
+
+    start = time.perf_counter()
+    results = asyncio.run(run_batch(pdfs, args.out, app.VOICE_MAPPING[args.voice],
+                                    args.documents, args.concurrency, on_result, output))
+    summary = summarize(results, time.perf_counter() - start)
+
+    if args.json:
+        print(json.dumps({'results': results, 'summary': summary}, indent=2))
+    else:
+        print(f"\n{summary['completed']} converted, {summary['skipped']} already done, "
+              f"{summary['failed']} failed in {summary['seconds']} s "
+              f"({summary['docs_per_min']} docs/min, {summary['chars_per_sec']} chars/sec)")
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""Compare PDF text extraction throughput: legacy, serial and parallel paths.
+
+- legacy:   the original implementation (string concatenation, one cleanup
+            pass over the whole text at the end)
+- serial:   iter_pdf_pages without the process pool
+- parallel: iter_pdf_pages fanned out across EXTRACT_WORKERS processes
+
+Usage: python benchmarks/bench_extract.py [--pages 50 200 1000] [--workers 4]
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from harness import bench_settings, fresh_caches  # noqa: E402
+
+bench_settings()
+
+import PyPDF2  # noqa: E402
+import app  # noqa: E402
+from corpus import generate_pdf  # noqa: E402
+
+
+def legacy_extract(pdf_path):
+    text = ""
+    with open(pdf_path, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        for page in reader.pages:
+            text += page.extract_text() + "\n"
+    return app.basic_text_cleanup(text)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, nargs='+', default=[50, 200, 1000])
+    parser.add_argument('--workers', type=int, default=app.app.config['EXTRACT_WORKERS'])
+    args = parser.parse_args()
+
+    logging.getLogger('pdftovoice').setLevel(logging.WARNING)
+    app.app.config['EXTRACT_WORKERS'] = args.workers
+    app.app.config['EXTRACT_PARALLEL_MIN_PAGES'] = 1
+
+    # Start the pool up front so worker start-up is not charged to the first run
+    pool = app.get_extract_pool()
+    if pool is not None:
+        list(pool.map(abs, range(args.workers)))
+
+    print(f"workers={args.workers}")
+    with tempfile.TemporaryDirectory() as workdir:
+        fresh_caches(workdir)
+        for pages in args.pages:
+            pdf_path = generate_pdf(os.path.join(workdir, f"synthetic-{pages}.pdf"), pages)
+            runs = {
+                'legacy': lambda: legacy_extract(pdf_path),
+                'serial': lambda: list(app.iter_pdf_pages(pdf_path, parallel=False)),
+                'parallel': lambda: list(app.iter_pdf_pages(pdf_path, parallel=True)),
+            }
+            line = [f"{pages:>6} pages"]
+            for name, fn in runs.items():
+                seconds, _ = timed(fn)
+                line.append(f"{name} {pages / seconds:8.1f} pages/s")
+            print('  '.join(line))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""Load benchmark for the audio job scheduler.
+
+Submits bursts of /generate-audio requests from a growing number of
+concurrent clients against a fake TTS backend and reports throughput,
+p50/p99 job latency (submit to completion), rejected requests and the
+process thread count.
+
+Usage: python benchmarks/bench_load.py [--concurrency 1 4 16 64] [--latency 0.2]
+"""
+import argparse
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from harness import bench_settings, fresh_caches, percentile  # noqa: E402
+
+bench_settings()
+
+import app  # noqa: E402
+from corpus import make_paragraph  # noqa: E402
+
+
+def run_client(client, text, client_ip):
+    """Submit one job and wait for it to finish. Returns latency or None if rejected."""
+    start = time.perf_counter()
+    response = client.post('/generate-audio', json={'text': text, 'voice': 'en'},
+                           environ_base={'REMOTE_ADDR': client_ip})
+    if response.status_code == 429:
+        return None
+    audio_id = response.get_json()['audio_id']
+    while True:
+        status = client.get(f'/audio-status/{audio_id}').get_json()['status']
+        if status in ('completed', 'failed'):
+            return time.perf_counter() - start
+        time.sleep(0.01)
+
+
+def run(concurrency, jobs_per_client, rng):
+    client = app.app.test_client()
+    # Unique texts so that neither cache short-circuits the TTS work
+    texts = [f"{uuid.uuid4()}. " + ' '.join(make_paragraph(rng) for _ in range(10))
+             for _ in range(concurrency * jobs_per_client)]
+    peak_threads = threading.active_count()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(run_client, client, text, f"10.0.0.{i % concurrency}")
+                   for i, text in enumerate(texts)]
+        while not all(f.done() for f in futures):
+            peak_threads = max(peak_threads, threading.active_count())
+            time.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    latencies = [f.result() for f in futures if f.result() is not None]
+    return {
+        'concurrency': concurrency,
+        'jobs': len(texts),
+        'completed': len(latencies),
+        'rejected': len(texts) - len(latencies),
+        'jobs_per_sec': len(latencies) / elapsed,
+        'p50': statistics.median(latencies) if latencies else 0.0,
+        'p99': percentile(latencies, 99),
+        # The benchmark's own client threads are included in this count
+        'peak_threads': peak_threads,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16, 64])
+    parser.add_argument('--jobs-per-client', type=int, default=4)
+    parser.add_argument('--latency', type=float, default=0.2, help='fake TTS latency per chunk (s)')
+    args = parser.parse_args()
+
+    logging.getLogger('pdftovoice').setLevel(logging.WARNING)
+    app.tts_backends[:] = [app.FakeTTSBackend(app.app.config['TTS_FAKE_CONCURRENCY'], latency=args.latency)]
+    rng = random.Random(0)
+
+    print(f"workers={app.app.config['SCHEDULER_WORKERS']} max_queue={app.app.config['SCHEDULER_MAX_QUEUE']}")
+    with tempfile.TemporaryDirectory() as workdir:
+        fresh_caches(workdir)
+        for concurrency in args.concurrency:
+            r = run(concurrency, args.jobs_per_client, rng)
+            print(f"concurrency {r['concurrency']:>4}  jobs {r['jobs']:>4}  rejected {r['rejected']:>4}  "
+                  f"{r['jobs_per_sec']:7.2f} jobs/s  p50 {r['p50']:6.2f} s  p99 {r['p99']:6.2f} s  "
+                  f"peak threads {r['peak_threads']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Check that memory stays flat when synthesizing very long documents.
+
+Generates synthetic PDFs of increasing size, streams them page by page
+through the synthesis pipeline against a fake TTS backend and reports the
+peak resident set size for each run. Fails (exit status 1) when the peak RSS
+growth of a larger document exceeds that of the smallest one by more than
+--tolerance-mb, i.e. when memory grows with the length of the document.
+
+Usage: python benchmarks/bench_memory.py [--pages 100 1000] [--tolerance-mb 16]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from harness import ResourceSampler, bench_settings, fresh_caches  # noqa: E402
+
+bench_settings()
+
+import app  # noqa: E402
+from corpus import generate_pdf  # noqa: E402
+
+
+def run(pages, workdir):
+    pdf_path = generate_pdf(os.path.join(workdir, f"synthetic-{pages}.pdf"), pages)
+    output_path = os.path.join(workdir, f"synthetic-{pages}.mp3")
+
+    sampler = ResourceSampler()
+    sampler.start()
+    start = time.perf_counter()
+    result = asyncio.run(app.process_text_in_chunks(
+        app.iter_pdf_pages(pdf_path), 'en-US-ChristopherNeural', output_path,
+        backends=[app.FakeTTSBackend(64, latency=0.0)]))
+    elapsed = time.perf_counter() - start
+    sampler.stop()
+
+    assert result, "synthesis failed"
+    return {
+        'pages': pages,
+        'pdf_bytes': os.path.getsize(pdf_path),
+        'audio_bytes': os.path.getsize(output_path),
+        'seconds': elapsed,
+        'rss_growth_mb': sampler.rss_growth_mb,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, nargs='+', default=[100, 1000])
+    parser.add_argument('--tolerance-mb', type=float, default=16,
+                        help='allowed extra RSS growth of larger documents over the smallest one')
+    args = parser.parse_args()
+    logging.getLogger('pdftovoice').setLevel(logging.WARNING)
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        fresh_caches(workdir)
+        for pages in sorted(args.pages):
+            r = run(pages, workdir)
+            results.append(r)
+            print(f"{r['pages']:>6} pages  pdf {r['pdf_bytes'] / 2**20:7.1f} MB  "
+                  f"audio {r['audio_bytes'] / 2**20:7.1f} MB  {r['seconds']:6.1f} s  "
+                  f"peak RSS growth {r['rss_growth_mb']:6.1f} MB")
+
+    bound = results[0]['rss_growth_mb'] + args.tolerance_mb
+    over = [r for r in results if r['rss_growth_mb'] > bound]
+    for r in over:
+        print(f"FAIL: {r['pages']} pages grew RSS by {r['rss_growth_mb']:.1f} MB, "
+              f"bound is {bound:.1f} MB ({results[0]['pages']} pages + {args.tolerance_mb:g} MB)")
+    if over:
+        sys.exit(1)
+    print(f"ok: peak RSS growth stayed within {bound:.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
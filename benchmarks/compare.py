@@ -0,0 +1,78 @@
+"""Compare two benchmark result files written by run_all.py.
+
+Prints every metric of every case present in both files with its relative
+change, and flags changes for the worse beyond --threshold percent. Metrics
+named *_per_sec are better when higher, all others (latencies, memory,
+threads) when lower. Exits with status 1 if any metric regressed, so the
+script can gate CI.
+
+Usage: python benchmarks/compare.py results/abc1234.json results/def5678.json [--threshold 10]
+"""
+import argparse
+import json
+import sys
+
+# Counts that are not performance measurements
+IGNORED = {'rejected'}
+
+
+def higher_is_better(metric):
+    return metric.endswith('_per_sec')
+
+
+def load(path):
+    with open(path) as f:
+        data = json.load(f)
+    cases = {}
+    for suite, rows in data['results'].items():
+        for row in rows:
+            cases[(suite, row['case'])] = row
+    return data['meta'], cases
+
+
+def compare(old, new, threshold):
+    """Yield (suite, case, metric, old value, new value, change %, regressed)."""
+    for key in sorted(old.keys() & new.keys()):
+        for metric, old_value in old[key].items():
+            if metric == 'case' or metric in IGNORED or metric not in new[key]:
+                continue
+            new_value = new[key][metric]
+            change = (new_value - old_value) / old_value * 100 if old_value else 0.0
+            worse = -change if higher_is_better(metric) else change
+            yield key[0], key[1], metric, old_value, new_value, change, worse > threshold
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('old')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='percent change for the worse that counts as a regression (default: 10)')
+    parser.add_argument('--all', action='store_true', help='show unchanged metrics too')
+    args = parser.parse_args(argv)
+
+    old_meta, old = load(args.old)
+    new_meta, new = load(args.new)
+    print(f"old: {old_meta.get('commit')} ({old_meta.get('timestamp')})  "
+          f"new: {new_meta.get('commit')} ({new_meta.get('timestamp')})")
+    if old_meta.get('profile') != new_meta.get('profile') or old_meta.get('latency') != new_meta.get('latency'):
+        print("warning: the runs used different settings, results may not be comparable")
+
+    regressions = 0
+    for suite, case, metric, old_value, new_value, change, regressed in compare(old, new, args.threshold):
+        regressions += regressed
+        if not (args.all or regressed or abs(change) > args.threshold):
+            continue
+        flag = 'REGRESSION' if regressed else ''
+        print(f"{suite:<10} {case:<28} {metric:<20} {old_value:>12.4g} -> {new_value:>12.4g}  "
+              f"{change:+7.1f}%  {flag}")
+
+    missing = old.keys() - new.keys()
+    if missing:
+        print(f"{len(missing)} cases missing from the new results")
+    print(f"{regressions} regressions beyond {args.threshold:g}%")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
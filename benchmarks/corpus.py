@@ -0,0 +1,136 @@
+"""Synthetic PDF corpora for the benchmarks.
+
+The PDFs are written by hand (plain text pages using a standard Type1 font)
+so no PDF authoring library is needed, and pages are streamed to disk one at
+a time so even very large documents can be generated cheaply.
+"""
+import random
+
+WORDS = (
+    "the of and to in is that for it as was with be by on not he this are or "
+    "his from at which but have an they you were her she there one all we can "
+    "their has been if more when will would who so no document chapter section "
+    "audio speech reader page voice text convert listen library student course"
+).split()
+
+
+def make_paragraph(rng, sentences=5):
+    """Return a paragraph of pseudo-random English-looking sentences."""
+    out = []
+    for _ in range(sentences):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(8, 18))]
+        out.append(' '.join(words).capitalize() + '.')
+    return ' '.join(out)
+
+
+def wrap(text, width, max_lines, hyphenate=False):
+    """Wrap text into at most max_lines lines of at most width characters.
+
+    With hyphenate, long words that do not fit are split across lines with a
+    trailing hyphen, like justified print layouts.
+    """
+    lines = []
+    line = ''
+    for word in text.split():
+        if len(line) + len(word) + 1 > width:
+            room = width - len(line) - 2
+            if hyphenate and line and len(word) >= 6 and room >= 3:
+                lines.append(f"{line} {word[:room]}-")
+                word = word[room:]
+            else:
+                lines.append(line)
+            line = word
+            if len(lines) >= max_lines:
+                break
+        else:
+            line = f"{line} {word}" if line else word
+    if line and len(lines) < max_lines:
+        lines.append(line)
+    return lines
+
+
+def page_lines(rng, page_num, lines_per_page=40, width=80):
+    """Return the wrapped lines of one page of body text."""
+    text = ' '.join(make_paragraph(rng) for _ in range(lines_per_page // 5))
+    return wrap(text, width, lines_per_page)
+
+
+def report_lines(rng, page_num, lines_per_page=40, width=80):
+    """Body text with hyphenated line ends, a running header and a page number footer."""
+    text = ' '.join(make_paragraph(rng) for _ in range(lines_per_page // 5))
+    body = wrap(text, width, lines_per_page - 4, hyphenate=True)
+    return [f"Annual Report - Chapter {page_num // 20 + 1}", ''] + body + ['', str(page_num + 1)]
+
+
+def slide_lines(rng, page_num, lines_per_page=40, width=80):
+    """A title and a few short bullet points, like exported presentation slides."""
+    title = ' '.join(rng.choice(WORDS) for _ in range(4)).title()
+    bullets = [f"- {' '.join(rng.choice(WORDS) for _ in range(rng.randint(4, 9)))}" for _ in range(5)]
+    return [title, ''] + bullets
+
+
+def dense_lines(rng, page_num, lines_per_page=40, width=80):
+    """Small-print page with long lines and many of them."""
+    return page_lines(rng, page_num, lines_per_page=55, width=110)
+
+
+LAYOUTS = {
+    'prose': page_lines,
+    'report': report_lines,
+    'slides': slide_lines,
+    'dense': dense_lines,
+}
+
+
+def _escape(line):
+    return line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def write_pdf(path, pages):
+    """Write an iterable of pages (each a list of text lines) to a PDF file."""
+    offsets = {}
+    with open(path, 'wb') as f:
+        def obj(num, body):
+            offsets[num] = f.tell()
+            f.write(f"{num} 0 obj\n".encode('latin-1'))
+            f.write(body)
+            f.write(b"\nendobj\n")
+
+        f.write(b"%PDF-1.4\n")
+        obj(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+        page_ids = []
+        num = 4
+        for lines in pages:
+            ops = ["BT", "/F1 11 Tf", "14 TL", "50 780 Td"]
+            for line in lines:
+                ops.append(f"({_escape(line)}) Tj T*")
+            ops.append("ET")
+            content = '\n'.join(ops).encode('latin-1', 'replace')
+            obj(num, b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+            obj(num + 1, (
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                f"/Resources << /Font << /F1 3 0 R >> >> /Contents {num} 0 R >>"
+            ).encode('latin-1'))
+            page_ids.append(num + 1)
+            num += 2
+
+        kids = ' '.join(f"{p} 0 R" for p in page_ids)
+        obj(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode('latin-1'))
+        obj(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+
+        xref_offset = f.tell()
+        f.write(f"xref\n0 {num}\n".encode('latin-1'))
+        f.write(b"0000000000 65535 f \n")
+        for i in range(1, num):
+            f.write(f"{offsets[i]:010d} 00000 n \n".encode('latin-1'))
+        f.write(f"trailer\n<< /Size {num} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode('latin-1'))
+    return path
+
+
+def generate_pdf(path, num_pages, seed=0, lines_per_page=40, layout='prose'):
+    """Generate a synthetic PDF with num_pages pages in one of LAYOUTS."""
+    rng = random.Random(seed)
+    make_page = LAYOUTS[layout]
+    pages = (make_page(rng, i, lines_per_page) for i in range(num_pages))
+    return write_pdf(path, pages)
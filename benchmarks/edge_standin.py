@@ -0,0 +1,115 @@
+"""Local stand-in for the Edge TTS websocket service.
+
+Speaks enough of the protocol for the app's edge backend: every SSML request
+is answered with turn.start, silent MP3 frames (about 15 characters per
+second of audio) and turn.end. It can add latency, fail a share of requests
+and throttle handshakes with 429 above a request rate, to exercise the
+backoff, rate limiting and circuit breaker without touching the real service.
+
+Usage:
+    python benchmarks/edge_standin.py --port 8765 --latency 0.2 --fail-rate 0.1 --max-rps 20
+    EDGE_TTS_WSS_URL='ws://127.0.0.1:8765/edge/v1?TrustedClientToken=x' TTS_BACKENDS=edge python app.py
+"""
+import argparse
+import asyncio
+import random
+import re
+import time
+
+from aiohttp import WSMsgType, web
+
+FRAME = b'\xff\xf3\x64\xc0' + bytes(140)  # 24 ms of MPEG-2 Layer III, 24 kHz, 48 kbit/s, mono
+FRAMES_PER_MESSAGE = 32
+CHARS_PER_SECOND = 15
+
+
+def parse(message):
+    head, _, body = message.partition('\r\n\r\n')
+    headers = dict(line.split(':', 1) for line in head.split('\r\n') if ':' in line)
+    return headers, body
+
+
+def text_message(request_id, path, body='{}'):
+    return (f'X-RequestId:{request_id}\r\nContent-Type:application/json; charset=utf-8\r\n'
+            f'Path:{path}\r\n\r\n{body}')
+
+
+def audio_message(request_id, data):
+    header = f'X-RequestId:{request_id}\r\nContent-Type:audio/mpeg\r\nPath:audio\r\n'.encode()
+    return len(header).to_bytes(2, 'big') + header + data
+
+
+class StandIn:
+    def __init__(self, latency, fail_rate, max_rps, seed):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.max_rps = max_rps
+        self.rng = random.Random(seed)
+        self.window = []
+        self.stats = {'connections': 0, 'requests': 0, 'failed': 0, 'throttled': 0}
+
+    def throttled(self):
+        if not self.max_rps:
+            return False
+        now = time.monotonic()
+        self.window = [t for t in self.window if now - t < 1]
+        if len(self.window) >= self.max_rps:
+            return True
+        self.window.append(now)
+        return False
+
+    async def handle(self, request):
+        if self.throttled():
+            self.stats['throttled'] += 1
+            return web.Response(status=429)
+
+        websocket = web.WebSocketResponse()
+        await websocket.prepare(request)
+        self.stats['connections'] += 1
+        async for message in websocket:
+            if message.type != WSMsgType.TEXT:
+                continue
+            headers, body = parse(message.data)
+            if headers.get('Path') != 'ssml':
+                continue
+
+            self.stats['requests'] += 1
+            request_id = headers.get('X-RequestId', '')
+            await asyncio.sleep(self.latency)
+            if self.rng.random() < self.fail_rate:
+                self.stats['failed'] += 1
+                await websocket.close()
+                break
+
+            text = re.sub(r'<[^>]+>', '', body)
+            frames = max(1, round(len(text) / CHARS_PER_SECOND / 0.024))
+            await websocket.send_str(text_message(request_id, 'turn.start'))
+            for start in range(0, frames, FRAMES_PER_MESSAGE):
+                count = min(FRAMES_PER_MESSAGE, frames - start)
+                await websocket.send_bytes(audio_message(request_id, FRAME * count))
+            await websocket.send_str(text_message(request_id, 'turn.end'))
+        return websocket
+
+    async def report(self, request):
+        return web.json_response(self.stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.2, help='seconds before each reply')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='share of requests that drop the connection')
+    parser.add_argument('--max-rps', type=int, default=0, help='handshakes per second before answering 429')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    standin = StandIn(args.latency, args.fail_rate, args.max_rps, args.seed)
+    web_app = web.Application()
+    web_app.router.add_get('/edge/v1', standin.handle)
+    web_app.router.add_get('/stats', standin.report)
+    web.run_app(web_app, host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""Measurement helpers shared by the benchmark scripts."""
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+
+def bench_settings():
+    """Set what app reads at import time. Call before the first import of app.
+
+    Keeps the job database apart from the app's and never touches the real
+    TTS service.
+    """
+    os.environ.setdefault('JOB_DB_PATH', os.path.join(tempfile.gettempdir(), 'pdf2voice-bench-jobs.sqlite3'))
+    os.environ['TTS_BACKENDS'] = 'fake'
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    os.environ.setdefault('REAPER_INTERVAL', '0')
+
+
+def fresh_caches(workdir):
+    """Point the caches at empty directories so no run benefits from an earlier one."""
+    import app
+    config = app.app.config
+    app.audio_cache = app.DiskCache(os.path.join(workdir, 'audio'), config['AUDIO_CACHE_MAX_BYTES'])
+    app.opus_cache = app.DiskCache(os.path.join(workdir, 'audio'), config['AUDIO_CACHE_MAX_BYTES'], suffix='.ogg')
+    app.segment_cache = app.DiskCache(os.path.join(workdir, 'segments'), config['SEGMENT_CACHE_MAX_BYTES'])
+    app.text_cache = app.DiskCache(os.path.join(workdir, 'text'), config['TEXT_CACHE_MAX_BYTES'], suffix='.json')
+    app.manifest_cache = app.DiskCache(os.path.join(workdir, 'manifests'), config['TEXT_CACHE_MAX_BYTES'],
+                                       suffix='.json')
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def current_rss():
+    """Resident set size of this process in bytes."""
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+class ResourceSampler(threading.Thread):
+    """Sample peak RSS and thread count of this process in the background."""
+
+    def __init__(self, interval=0.05):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.baseline_rss = current_rss()
+        self.peak_rss = self.baseline_rss
+        self.peak_threads = threading.active_count()
+        self.running = True
+
+    def run(self):
+        while self.running:
+            self.peak_rss = max(self.peak_rss, current_rss())
+            self.peak_threads = max(self.peak_threads, threading.active_count())
+            time.sleep(self.interval)
+
+    def stop(self):
+        self.running = False
+        self.join()
+        return self
+
+    @property
+    def rss_growth_mb(self):
+        return (self.peak_rss - self.baseline_rss) / 2**20
+
+
+def git_revision(repo_dir):
+    """Return (commit, dirty) for the repository, or (None, None) outside git."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=repo_dir,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=repo_dir,
+                                capture_output=True, text=True, check=True).stdout
+        return commit, bool(status.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def environment(repo_dir):
+    commit, dirty = git_revision(repo_dir)
+    return {
+        'commit': commit,
+        'dirty': dirty,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
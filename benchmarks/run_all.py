@@ -0,0 +1,254 @@
+"""Run the benchmark suite and store the results as JSON.
+
+Suites:
+- extract:   pages/sec and per-page p50/p99 for each corpus layout and size,
+             serial and through the process pool
+- cleanup:   throughput of the old and current cleanup and of TextNormalizer
+             over the extracted pages, and the share of characters kept
+- synthesis: streamed PDF to MP3 through process_text_in_chunks against the
+             fake TTS backend (chars/sec, peak RSS growth, peak threads)
+- e2e:       concurrent POST /convert requests through the Flask test client,
+             from upload to finished audio (jobs/sec, p50/p99 latency)
+
+Every run starts with empty caches. Results are written to
+benchmarks/results/<commit>.json (or --output) and can be compared between
+commits with compare.py.
+
+Usage: python benchmarks/run_all.py [--quick] [--suites extract e2e] [--latency 0.05]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from harness import ResourceSampler, bench_settings, environment, fresh_caches, percentile  # noqa: E402
+
+bench_settings()
+
+import app  # noqa: E402
+from corpus import LAYOUTS, generate_pdf  # noqa: E402
+
+SIZES = {'full': [10, 100, 1000], 'quick': [10, 100]}
+E2E_CLIENTS = {'full': [1, 4, 16], 'quick': [1, 4]}
+VOICE = app.VOICE_MAPPING['en']
+
+
+def corpus(workdir, layout, pages, seed=0):
+    path = os.path.join(workdir, f"{layout}-{pages}-{seed}.pdf")
+    if not os.path.exists(path):
+        generate_pdf(path, pages, seed=seed, layout=layout)
+    return path
+
+
+def timed_pages(pages):
+    """Consume a page iterator, returning the pages and the time spent on each."""
+    texts = []
+    durations = []
+    start = time.perf_counter()
+    for text in pages:
+        now = time.perf_counter()
+        durations.append(now - start)
+        texts.append(text)
+        start = now
+    return texts, durations
+
+
+def bench_extract(workdir, sizes):
+    results = []
+    for layout in LAYOUTS:
+        for pages in sizes:
+            path = corpus(workdir, layout, pages)
+            for mode in ('serial', 'parallel'):
+                sampler = ResourceSampler()
+                sampler.start()
+                start = time.perf_counter()
+                texts, durations = timed_pages(app.iter_pdf_pages(path, parallel=mode == 'parallel'))
+                elapsed = time.perf_counter() - start
+                sampler.stop()
+                results.append({
+                    'case': f"{layout}/{pages}/{mode}",
+                    'pages_per_sec': pages / elapsed,
+                    'chars_per_sec': sum(map(len, texts)) / elapsed,
+                    'page_p50_ms': percentile(durations, 50) * 1000,
+                    'page_p99_ms': percentile(durations, 99) * 1000,
+                    'peak_rss_growth_mb': sampler.rss_growth_mb,
+                })
+    return results
+
+
+def legacy_cleanup(text):
+    """basic_text_cleanup as it was before the single-pass rewrite, for reference."""
+    import re
+    text = re.sub(r' {2,}', ' ', text)
+    text = text.replace('\t', ' ')
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    text = re.sub(r'\r\n?', '\n', text)
+    return text.strip()
+
+
+def bench_cleanup(workdir, sizes):
+    """Cleanup throughput and how much text is left for synthesis."""
+    results = []
+    cleaners = {
+        'legacy': lambda pages: [legacy_cleanup(page) for page in pages],
+        'basic': lambda pages: [app.basic_text_cleanup(page) for page in pages],
+        'normalize': lambda pages: list(app.TextNormalizer().normalize_pages(pages)),
+    }
+    for layout in LAYOUTS:
+        path = corpus(workdir, layout, max(sizes))
+        pages = list(app.iter_raw_pdf_pages(path, parallel=False))
+        # Repeat small corpora so that each measurement covers a few MB of text
+        repeat = max(1, 4 * 2**20 // max(1, sum(map(len, pages))))
+        chars = sum(map(len, pages)) * repeat
+        for name, clean in cleaners.items():
+            start = time.perf_counter()
+            for _ in range(repeat):
+                cleaned = clean(pages)
+            elapsed = time.perf_counter() - start
+            results.append({
+                'case': f"{layout}/{len(pages)}/{name}",
+                'mb_per_sec': chars / elapsed / 2**20,
+                'chars_kept_pct': sum(map(len, cleaned)) * repeat / chars * 100,
+            })
+    return results
+
+
+def bench_synthesis(workdir, sizes, latency):
+    results = []
+    backends = [app.FakeTTSBackend(app.app.config['TTS_FAKE_CONCURRENCY'], latency=latency)]
+    for pages in sizes:
+        path = corpus(workdir, 'prose', pages, seed=1)
+        output_path = os.path.join(workdir, f"synthesis-{pages}.mp3")
+        chars = {'done': 0}
+        sampler = ResourceSampler()
+        sampler.start()
+        start = time.perf_counter()
+        ok = asyncio.run(app.process_text_in_chunks(
+            app.iter_pdf_pages(path), VOICE, output_path, backends=backends,
+            on_progress=lambda progress: chars.update(done=progress['chars_done'])))
+        elapsed = time.perf_counter() - start
+        sampler.stop()
+        if not ok:
+            raise RuntimeError(f"synthesis of {pages} pages failed")
+        results.append({
+            'case': f"prose/{pages}",
+            'seconds': elapsed,
+            'chars_per_sec': chars['done'] / elapsed,
+            'audio_mb_per_sec': os.path.getsize(output_path) / elapsed / 2**20,
+            'peak_rss_growth_mb': sampler.rss_growth_mb,
+            'peak_threads': sampler.peak_threads,
+        })
+        os.remove(output_path)
+    return results
+
+
+def convert_once(client, path, client_ip):
+    """Upload a PDF to /convert and wait for the audio. Returns latency or None if rejected."""
+    start = time.perf_counter()
+    with open(path, 'rb') as f:
+        response = client.post('/convert', data={'file': (f, os.path.basename(path)), 'voice': 'en'},
+                               environ_base={'REMOTE_ADDR': client_ip})
+    if response.status_code == 429:
+        return None
+    audio_id = response.get_json()['audio_id']
+    while True:
+        status = client.get(f'/audio-status/{audio_id}').get_json()['status']
+        if status == 'completed':
+            return time.perf_counter() - start
+        if status == 'failed':
+            raise RuntimeError(f"conversion of {path} failed")
+        time.sleep(0.01)
+
+
+def bench_e2e(workdir, client_counts, latency, pages=20, jobs_per_client=3):
+    app.tts_backends[:] = [app.FakeTTSBackend(app.app.config['TTS_FAKE_CONCURRENCY'], latency=latency)]
+    client = app.app.test_client()
+    results = []
+    seed = 100
+    for clients in client_counts:
+        # Distinct documents, so that every request does the full work
+        paths = []
+        for _ in range(clients * jobs_per_client):
+            paths.append(corpus(workdir, 'report', pages, seed=seed))
+            seed += 1
+        sampler = ResourceSampler()
+        sampler.start()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            latencies = list(pool.map(lambda args: convert_once(client, *args),
+                                      [(path, f"10.0.0.{i % clients}") for i, path in enumerate(paths)]))
+        elapsed = time.perf_counter() - start
+        sampler.stop()
+        completed = [latency for latency in latencies if latency is not None]
+        results.append({
+            'case': f"report/{pages}/clients={clients}",
+            'jobs_per_sec': len(completed) / elapsed,
+            'p50_ms': percentile(completed, 50) * 1000,
+            'p99_ms': percentile(completed, 99) * 1000,
+            'rejected': len(latencies) - len(completed),
+            'peak_rss_growth_mb': sampler.rss_growth_mb,
+            # Includes the benchmark's own client threads
+            'peak_threads': sampler.peak_threads,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--suites', nargs='+', default=['extract', 'cleanup', 'synthesis', 'e2e'],
+                        choices=['extract', 'cleanup', 'synthesis', 'e2e'])
+    parser.add_argument('--quick', action='store_true', help='smaller corpora, for a fast check')
+    parser.add_argument('--latency', type=float, default=0.05, help='fake TTS latency per chunk (s)')
+    parser.add_argument('--output', help='result file (default: benchmarks/results/<commit>.json)')
+    args = parser.parse_args()
+
+    logging.getLogger('pdftovoice').setLevel(logging.WARNING)
+    profile = 'quick' if args.quick else 'full'
+    sizes = SIZES[profile]
+    meta = dict(environment(REPO_DIR), profile=profile, latency=args.latency,
+                extract_workers=app.app.config['EXTRACT_WORKERS'])
+
+    # Start the extraction pool up front so worker start-up is not charged to the first run
+    pool = app.get_extract_pool()
+    if pool is not None:
+        list(pool.map(abs, range(app.app.config['EXTRACT_WORKERS'])))
+
+    workdir = tempfile.mkdtemp(prefix='pdf2voice-bench-')
+    fresh_caches(workdir)
+    suites = {
+        'extract': lambda: bench_extract(workdir, sizes),
+        'cleanup': lambda: bench_cleanup(workdir, sizes),
+        'synthesis': lambda: bench_synthesis(workdir, sizes, args.latency),
+        'e2e': lambda: bench_e2e(workdir, E2E_CLIENTS[profile], args.latency),
+    }
+    results = {}
+    try:
+        for name in args.suites:
+            print(f"== {name}", flush=True)
+            results[name] = suites[name]()
+            for row in results[name]:
+                metrics = '  '.join(f"{k} {v:.4g}" for k, v in row.items() if k != 'case')
+                print(f"  {row['case']:<28} {metrics}", flush=True)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    output = args.output or os.path.join(BENCH_DIR, 'results', f"{meta['commit'] or 'unknown'}"
+                                         f"{'-dirty' if meta['dirty'] else ''}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({'meta': meta, 'results': results}, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,4 @@
-const CACHE_NAME = 'pdf2voice-cache-v1';
+const CACHE_NAME = 'pdf2voice-cache-v2';
 const urlsToCache = [
   '/',
   '/static/manifest.json',
@@ -19,6 +19,12 @@ self.addEventListener('install', event => {
 
 // Cache and return requests
 self.addEventListener('fetch', event => {
+  // Let the browser handle live job updates directly
+  if (event.request.url.includes('/audio-events/') ||
+      event.request.url.includes('/audio-status/')) {
+    return;
+  }
+
   event.respondWith(
     caches.match(event.request)
       .then(response => {
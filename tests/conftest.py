@@ -0,0 +1,55 @@
+"""Shared setup: app is imported with the fake TTS backend and a job database of its own."""
+import os
+import sys
+import tempfile
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+os.environ.setdefault('JOB_DB_PATH', os.path.join(tempfile.mkdtemp(), 'jobs.sqlite3'))
+os.environ['TTS_BACKENDS'] = 'fake'
+os.environ.setdefault('REAPER_INTERVAL', '0')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+import app  # noqa: E402
+from harness import fresh_caches  # noqa: E402
+
+
+class FailingBackend(app.FakeTTSBackend):
+    """Fake backend that fails every request, standing in for an unreachable service."""
+
+    name = 'edge'
+
+    def __init__(self, concurrency=4):
+        super().__init__(concurrency, latency=0)
+
+    async def _synthesize(self, text, voice, rate):
+        raise app.TTSBackendError('Service unreachable')
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Empty caches and audio folder, no retry delays and no circuit breaking."""
+    monkeypatch.setitem(app.app.config, 'AUDIO_FOLDER', str(tmp_path / 'audio'))
+    monkeypatch.setitem(app.app.config, 'UPLOAD_FOLDER', str(tmp_path / 'uploads'))
+    os.makedirs(tmp_path / 'audio')
+    os.makedirs(tmp_path / 'uploads')
+    monkeypatch.setitem(app.app.config, 'TTS_BACKOFF_BASE', 0)
+    monkeypatch.setitem(app.app.config, 'TTS_BREAKER_FAILURES', 1000)
+    fresh_caches(str(tmp_path))
+    return tmp_path
+
+
+def wait_for_job(audio_id, timeout=10):
+    """Wait until a job is completed or failed and return its record."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = app.job_store.get(audio_id)
+        if job and job['status'] in ('completed', 'failed'):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {audio_id} did not finish within {timeout}s")
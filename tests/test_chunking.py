@@ -0,0 +1,93 @@
+"""Chunked synthesis: splitting, ordered stitching and per-chunk retries."""
+import asyncio
+import os
+import random
+
+import app
+from conftest import wait_for_job
+
+SENTENCES = [f"Sentence number {n} is here to fill the page with some words." for n in range(40)]
+TEXT = ' '.join(SENTENCES[:20]) + '\n\n' + ' '.join(SENTENCES[20:])
+
+
+class EchoBackend(app.FakeTTSBackend):
+    """Returns the text of each chunk as its audio, after a random delay.
+
+    Requests listed in `failures` ({chunk text: count}) fail that many times
+    first.
+    """
+
+    def __init__(self, failures=None):
+        super().__init__(4)
+        self.failures = dict(failures or {})
+        self.rng = random.Random(0)
+
+    async def _synthesize(self, text, voice, rate):
+        await asyncio.sleep(self.rng.uniform(0, 0.01))
+        if self.failures.get(text, 0) > 0:
+            self.failures[text] -= 1
+            raise app.TTSBackendError('Service unavailable')
+        return f"[{text}]".encode()
+
+
+def synthesize(tmp_path, backend, text=TEXT):
+    path = str(tmp_path / 'out.mp3')
+    result = asyncio.run(app.process_text_in_chunks(text, 'en-US-AriaNeural', path, backends=[backend]))
+    return result, path
+
+
+def test_chunks_end_at_sentence_boundaries():
+    chunks = app.split_text_into_chunks(TEXT, max_chars=200)
+    assert len(chunks) > 5
+    assert all(len(chunk) <= 200 and chunk.endswith('.') for chunk in chunks)
+    assert ' '.join(chunks).split() == TEXT.split()
+
+
+def test_long_sentence_is_split_at_whitespace():
+    chunks = app.split_text_into_chunks('word ' * 100, max_chars=50)
+    assert all(len(chunk) <= 50 for chunk in chunks)
+    assert ' '.join(chunks).split() == ['word'] * 100
+
+
+def test_chunks_are_stitched_in_document_order(workdir, monkeypatch):
+    monkeypatch.setitem(app.app.config, 'TTS_CHUNK_CHARS', 200)
+    chunks = app.split_text_into_chunks(TEXT)
+
+    result, path = synthesize(workdir, EchoBackend())
+    assert result
+    with open(path, 'rb') as f:
+        assert f.read() == b''.join(f"[{chunk}]".encode() for chunk in chunks)
+
+
+def test_failed_chunk_is_retried(workdir, monkeypatch):
+    monkeypatch.setitem(app.app.config, 'TTS_CHUNK_CHARS', 200)
+    chunks = app.split_text_into_chunks(TEXT)
+    backend = EchoBackend(failures={chunks[1]: 2})
+
+    result, path = synthesize(workdir, backend)
+    assert result
+    assert backend.requests == len(chunks) + 2
+    with open(path, 'rb') as f:
+        assert f.read() == b''.join(f"[{chunk}]".encode() for chunk in chunks)
+
+
+def test_chunk_failing_every_attempt_fails_the_document(workdir, monkeypatch):
+    monkeypatch.setitem(app.app.config, 'TTS_CHUNK_CHARS', 200)
+    chunks = app.split_text_into_chunks(TEXT)
+    backend = EchoBackend(failures={chunks[3]: 100})
+
+    result, path = synthesize(workdir, backend)
+    assert result is False
+    assert backend.failures[chunks[3]] == 100 - (app.app.config['TTS_CHUNK_RETRIES'] + 1)
+    assert not os.path.exists(path) and not os.path.exists(path + '.part')
+
+
+def test_chunk_failing_every_attempt_fails_the_job(workdir, monkeypatch):
+    monkeypatch.setitem(app.app.config, 'TTS_CHUNK_CHARS', 200)
+    chunks = app.split_text_into_chunks(TEXT)
+    monkeypatch.setattr(app, 'tts_backends', [EchoBackend(failures={chunks[-1]: 100})])
+
+    response = app.app.test_client().post('/generate-audio', json={'text': TEXT, 'voice': 'en'})
+    job = wait_for_job(response.get_json()['audio_id'])
+    assert job['status'] == 'failed'
+    assert app.Mp3Sink.lookup(response.get_json()['audio_id']) is None
@@ -0,0 +1,197 @@
+"""Edge backend against the local stand-in service in benchmarks/edge_standin.py.
+
+Covers connection reuse, the retry of a request on a stale idle connection,
+429 handling, load shedding by the token bucket and the circuit breaker.
+"""
+import asyncio
+import time
+
+import pytest
+from aiohttp import web
+
+import app
+from edge_standin import StandIn
+
+VOICE = 'en-US-AriaNeural'
+RATE = '+0%'
+TEXT = 'The quick brown fox jumps over the lazy dog.'
+
+
+class Script:
+    """Stand-in for the stand-in's random source: fails the requests listed in `fail`."""
+
+    def __init__(self, fail):
+        self.fail = list(fail)
+
+    def random(self):
+        return 0.0 if self.fail and self.fail.pop(0) else 1.0
+
+
+async def serve(standin):
+    web_app = web.Application()
+    web_app.router.add_get('/edge/v1', standin.handle)
+    runner = web.AppRunner(web_app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f"ws://127.0.0.1:{port}/edge/v1?TrustedClientToken=test"
+
+
+def run(standin, test, **settings):
+    """Run test(backend) against a fresh stand-in and edge backend."""
+    async def main():
+        runner, url = await serve(standin)
+        previous = {key: app.app.config[key] for key in settings}
+        app.app.config.update(settings)
+        try:
+            backend = app.EdgeTTSBackend(4, wss_url=url)
+        finally:
+            app.app.config.update(previous)
+        try:
+            return await test(backend)
+        finally:
+            await backend.close()
+            await runner.cleanup()
+    return asyncio.run(main())
+
+
+def test_connections_are_reused():
+    standin = StandIn(latency=0, fail_rate=0, max_rps=0, seed=0)
+
+    async def test(backend):
+        for _ in range(3):
+            data = await backend.synthesize(TEXT, VOICE, RATE, timeout=10)
+            assert data.startswith(b'\xff\xf3')
+        return backend.stats()
+
+    stats = run(standin, test)
+    assert stats['connections_opened'] == 1
+    assert stats['connections_reused'] == 2
+    assert standin.stats['connections'] == 1
+    assert standin.stats['requests'] == 3
+
+
+def test_stale_connection_is_retried_on_a_new_one():
+    standin = StandIn(latency=0, fail_rate=1, max_rps=0, seed=0)
+    # The second request finds its idle connection dropped by the service
+    standin.rng = Script([False, True, False])
+
+    async def test(backend):
+        await backend.synthesize(TEXT, VOICE, RATE, timeout=10)
+        data = await backend.synthesize(TEXT, VOICE, RATE, timeout=10)
+        return data, backend.stats()
+
+    data, stats = run(standin, test)
+    assert data
+    assert stats['connections_opened'] == 2
+    assert stats['failures'] == 0
+    assert standin.stats['failed'] == 1
+
+
+def test_dropped_new_connection_is_not_retried():
+    standin = StandIn(latency=0, fail_rate=1, max_rps=0, seed=0)
+
+    async def test(backend):
+        with pytest.raises(app.TTSBackendError, match='closed before the audio'):
+            await backend.synthesize(TEXT, VOICE, RATE, timeout=10)
+        return backend.stats()
+
+    stats = run(standin, test)
+    assert stats['connections_opened'] == 1
+    assert standin.stats['requests'] == 1
+
+
+def test_429_slows_down_the_token_bucket():
+    standin = StandIn(latency=0, fail_rate=0, max_rps=1, seed=0)
+
+    async def test(backend):
+        await backend.synthesize(TEXT, VOICE, RATE, timeout=10)
+        # Drop the idle connection, so the next request needs a new handshake
+        await backend.close()
+        with pytest.raises(app.TTSBackendError, match='429'):
+            await backend.synthesize(TEXT, VOICE, RATE, timeout=10)
+        return backend.rate_limiter
+
+    limiter = run(standin, test, EDGE_TTS_RATE_LIMIT=10, EDGE_TTS_BURST=10)
+    assert standin.stats['throttled'] == 1
+    assert limiter.rate == 5
+    limiter.speed_up()
+    assert limiter.rate == 6
+
+
+def test_token_bucket_sheds_requests_beyond_max_wait():
+    standin = StandIn(latency=0, fail_rate=0, max_rps=0, seed=0)
+
+    async def test(backend):
+        await backend.synthesize(TEXT, VOICE, RATE, timeout=10)
+        with pytest.raises(app.RateLimitedError):
+            await backend.synthesize(TEXT, VOICE, RATE, timeout=10)
+        return backend.stats()
+
+    stats = run(standin, test, EDGE_TTS_RATE_LIMIT=0.1, EDGE_TTS_BURST=1, EDGE_TTS_MAX_WAIT=1)
+    # The shed request never reached the service and does not count as a failure
+    assert standin.stats['requests'] == 1
+    assert stats['failures'] == 0
+    assert stats['circuit'] == 'closed'
+
+
+def test_token_bucket_waits_within_max_wait():
+    bucket = app.TokenBucket(rate=20, burst=1)
+
+    async def test():
+        start = time.monotonic()
+        await bucket.acquire(max_wait=1)
+        await bucket.acquire(max_wait=1)
+        return time.monotonic() - start
+
+    assert 0.04 <= asyncio.run(test()) < 0.5
+
+
+def test_circuit_opens_and_probes_after_reset_timeout():
+    standin = StandIn(latency=0, fail_rate=1, max_rps=0, seed=0)
+
+    async def test(backend):
+        for _ in range(2):
+            with pytest.raises(app.TTSBackendError):
+                await backend.synthesize(TEXT, VOICE, RATE, timeout=10)
+        assert backend.breaker.state == 'open'
+        with pytest.raises(app.CircuitOpenError):
+            await backend.synthesize(TEXT, VOICE, RATE, timeout=10)
+        assert standin.stats['requests'] == 2
+
+        # After the reset timeout one probe goes through; it fails and re-opens the circuit
+        await asyncio.sleep(0.1)
+        with pytest.raises(app.TTSBackendError):
+            await backend.synthesize(TEXT, VOICE, RATE, timeout=10)
+        assert backend.breaker.state == 'open'
+        assert standin.stats['requests'] == 3
+
+        # The next probe succeeds and closes it
+        standin.fail_rate = 0
+        await asyncio.sleep(0.1)
+        assert await backend.synthesize(TEXT, VOICE, RATE, timeout=10)
+        return backend.breaker
+
+    breaker = run(standin, test, TTS_BREAKER_FAILURES=2, TTS_BREAKER_RESET=0.05)
+    assert breaker.state == 'closed'
+    assert breaker.times_opened == 2
+
+
+def test_half_open_circuit_lets_one_probe_through():
+    breaker = app.CircuitBreaker(threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == 'half-open'
+    # Others are refused while the probe is in flight
+    assert not breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == 'closed'
+    assert breaker.allow() and breaker.allow()
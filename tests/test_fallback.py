@@ -0,0 +1,57 @@
+"""Audio made by a fallback backend is served to its own job but never cached."""
+import app
+from conftest import FailingBackend, wait_for_job
+
+TEXT = 'Audio that had to be made by the fallback voice. ' * 20
+
+
+def generate(client, text=TEXT):
+    response = client.post('/generate-audio', json={'text': text, 'voice': 'en'})
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+
+def test_degraded_audio_is_never_a_cache_hit(workdir, monkeypatch):
+    monkeypatch.setattr(app, 'tts_backends', [FailingBackend(), app.FakeTTSBackend(4, latency=0)])
+    client = app.app.test_client()
+
+    first = generate(client)
+    audio_id = first['audio_id']
+    job = wait_for_job(audio_id)
+    assert job['status'] == 'completed'
+    assert job['progress']['degraded']
+    # The job's own client still gets the audio, from outside the cache
+    assert app.Mp3Sink.lookup(audio_id) is None
+    response = client.get(f'/audio/{audio_id}')
+    assert response.status_code == 200 and len(response.data) > 100
+
+    # Asking again synthesizes the document again instead of serving the fallback audio
+    second = generate(client)
+    assert second['status'] == 'queued'
+    # Also while that job is queued or running, the canonical cache entry does not exist
+    assert generate(client).get('message') != 'Audio served from cache'
+    assert wait_for_job(audio_id)['progress']['degraded']
+    assert app.Mp3Sink.lookup(audio_id) is None
+
+
+def test_primary_audio_is_cached(workdir, monkeypatch):
+    monkeypatch.setattr(app, 'tts_backends', [app.FakeTTSBackend(4, latency=0)])
+    client = app.app.test_client()
+
+    audio_id = generate(client, 'Audio made by the preferred voice. ' * 20)['audio_id']
+    job = wait_for_job(audio_id)
+    assert job['status'] == 'completed' and not job['progress'].get('degraded')
+    assert app.Mp3Sink.lookup(audio_id)
+    assert generate(client, 'Audio made by the preferred voice. ' * 20)['message'] == 'Audio served from cache'
+
+
+def test_degraded_hls_is_written_outside_the_cache(workdir, monkeypatch):
+    monkeypatch.setattr(app, 'tts_backends', [FailingBackend(), app.FakeTTSBackend(4, latency=0)])
+    client = app.app.test_client()
+
+    response = client.post('/generate-audio', json={'text': TEXT, 'voice': 'en', 'format': 'hls'})
+    audio_id = response.get_json()['audio_id']
+    assert wait_for_job(audio_id)['status'] == 'completed'
+    assert app.HlsSink.lookup(audio_id) is None
+    playlist = client.get(f'/audio/{audio_id}/hls/{app.HlsSink.PLAYLIST}')
+    assert playlist.status_code == 200 and b'#EXT-X-ENDLIST' in playlist.data
@@ -0,0 +1,82 @@
+"""Job records: liveness of their owners and claiming a job."""
+import os
+import socket
+import time
+
+import pytest
+
+import app
+from conftest import wait_for_job
+from corpus import generate_pdf
+
+
+def record(owner, age):
+    return {'status': 'processing', 'owner': owner, 'updated_at': time.time() - age}
+
+
+def test_same_host_job_needs_a_live_pid_and_a_fresh_heartbeat():
+    stale = app.app.config['JOB_STALE_SECONDS'] + 1
+    # The parent of the test process stands in for another worker on this host
+    live = f"{socket.gethostname()}:{os.getppid()}:token"
+    assert app.job_is_running('job', record(live, 0))
+    # A live pid with a stale heartbeat is a restarted process that reused the pid
+    assert not app.job_is_running('job', record(live, stale))
+
+    dead_pid = max(int(pid) for pid in os.listdir('/proc') if pid.isdigit()) + 10000
+    dead = f"{socket.gethostname()}:{dead_pid}:token"
+    assert not app.job_is_running('job', record(dead, 0))
+
+
+def test_other_host_job_is_judged_by_its_heartbeat():
+    stale = app.app.config['JOB_STALE_SECONDS'] + 1
+    assert app.job_is_running('job', record('elsewhere:1:token', 0))
+    assert not app.job_is_running('job', record('elsewhere:1:token', stale))
+    assert not app.job_is_running('job', record(None, stale))
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'memory':
+        return app.MemoryJobStore(ttl=60)
+    return app.SQLiteJobStore(str(tmp_path / 'jobs.sqlite3'), ttl=60)
+
+
+def test_only_one_claim_of_a_job_succeeds(store):
+    assert store.claim('job', owner='first')
+    assert not store.claim('job', owner='second')
+    assert store.get('job')['owner'] == 'first'
+    store.update('job', status='processing')
+    assert not store.claim('job', owner='second')
+
+
+def test_finished_and_expired_jobs_can_be_claimed_again(store):
+    store.create('done', status='failed', error='Job was interrupted')
+    assert store.claim('done', owner='again')
+    job = store.get('done')
+    assert job['status'] == 'queued' and job['error'] is None
+
+    store.claim('old', owner='first')
+    store.ttl = -1
+    assert store.claim('old', owner='second')
+
+
+def test_identical_concurrent_conversions_share_one_job(workdir, monkeypatch, tmp_path):
+    monkeypatch.setattr(app, 'tts_backends', [app.FakeTTSBackend(4, latency=0.05)])
+    # Both requests get past the check for an existing job before either queues it
+    monkeypatch.setattr(app, 'existing_audio_job', lambda audio_id, output, lookup=None: None)
+    generate_pdf(str(tmp_path / 'doc.pdf'), 2, seed=1, lines_per_page=5)
+    client = app.app.test_client()
+
+    def convert():
+        with open(tmp_path / 'doc.pdf', 'rb') as f:
+            response = client.post('/convert', data={'file': (f, 'doc.pdf')},
+                                   content_type='multipart/form-data')
+        assert response.status_code == 200
+        return response.get_json()
+
+    first, second = convert(), convert()
+    assert first['audio_id'] == second['audio_id']
+    assert second['message'] == 'Audio generation already in progress'
+    job = wait_for_job(first['audio_id'])
+    assert job['status'] == 'completed', job['error']
+    assert app.Mp3Sink.lookup(first['audio_id'])
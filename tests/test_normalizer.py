@@ -0,0 +1,43 @@
+"""TextNormalizer: page numbers, running headers and hyphenation."""
+import app
+
+
+def normalize(pages):
+    return list(app.TextNormalizer().normalize_pages(pages))
+
+
+def body(n):
+    return f"Paragraph {n} of the document, which goes on for a little while and then ends."
+
+
+def test_page_numbers_and_running_headers_are_dropped():
+    pages = [f"Annual report | {n}\n\n{body(n)}\n\nPage {n} of 6" for n in range(1, 7)]
+    assert normalize(pages) == [body(n) for n in range(1, 7)]
+
+
+def test_verbatim_running_header_is_dropped():
+    pages = [f"Annual report 2023\n\n{body(n)}\n\n{n}" for n in range(1, 5)]
+    assert normalize(pages) == [body(n) for n in range(1, 5)]
+
+
+def test_numbered_headings_on_consecutive_pages_are_kept():
+    pages = [f"Chapter {n}\n\n{body(n)}" for n in range(1, 6)]
+    assert normalize(pages) == [f"Chapter {n}\n\n{body(n)}" for n in range(1, 6)]
+
+
+def test_numbered_header_on_two_pages_is_kept():
+    pages = [f"Results | {n}\n\n{body(n)}" for n in range(1, 3)]
+    assert normalize(pages) == [f"Results | {n}\n\n{body(n)}" for n in range(1, 3)]
+
+
+def test_years_and_capital_numerals_are_kept():
+    pages = [f"{body(n)}\n\n{last}" for n, last in enumerate(['1999', 'IV', 'xii'])]
+    assert normalize(pages) == [f"{body(0)}\n\n1999", f"{body(1)}\n\nIV", body(2)]
+
+
+def test_words_split_across_lines_are_joined():
+    assert normalize(["An infor-\nmation state-\nment."]) == ["An information statement."]
+
+
+def test_hyphenated_compounds_keep_their_hyphen():
+    assert normalize(["A well-\nknown and self-\naware reader."]) == ["A well-known and self-aware reader."]
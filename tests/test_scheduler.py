@@ -0,0 +1,89 @@
+"""Fair scheduling: one client's batch cannot take the queue from others."""
+import asyncio
+import io
+import threading
+
+import app
+from conftest import wait_for_job
+from corpus import generate_pdf
+
+
+class GatedBackend(app.FakeTTSBackend):
+    """Fake backend that holds every request until the gate is opened."""
+
+    def __init__(self):
+        super().__init__(4, latency=0)
+        self.gate = threading.Event()
+
+    async def _synthesize(self, text, voice, rate):
+        while not self.gate.is_set():
+            await asyncio.sleep(0.01)
+        return await super()._synthesize(text, voice, rate)
+
+
+def pdf_bytes(tmp_path, seed):
+    path = tmp_path / f'doc-{seed}.pdf'
+    generate_pdf(str(path), 1, seed=seed, lines_per_page=5)
+    return path.read_bytes()
+
+
+def test_batch_cannot_starve_other_clients(workdir, monkeypatch):
+    backend = GatedBackend()
+    monkeypatch.setattr(app, 'tts_backends', [backend])
+    monkeypatch.setattr(app, 'scheduler', app.JobScheduler(workers=2, max_queue=6, max_per_client=3))
+    client = app.app.test_client()
+
+    files = [(io.BytesIO(pdf_bytes(workdir, seed)), f'doc-{seed}.pdf') for seed in range(10)]
+    response = client.post('/batch', data={'files': files}, content_type='multipart/form-data',
+                           environ_base={'REMOTE_ADDR': '10.0.0.1'})
+    assert response.status_code == 200
+    batch = response.get_json()
+    # Nothing is rejected: what does not fit waits for the batch's own jobs to be taken
+    assert batch['counts'].get('rejected', 0) == 0
+    assert app.scheduler.stats()['queued'] <= 3
+
+    response = client.post('/generate-audio', json={'text': 'Another client. ' * 20, 'voice': 'en'},
+                           environ_base={'REMOTE_ADDR': '10.0.0.2'})
+    assert response.status_code == 200
+    other = response.get_json()['audio_id']
+
+    # Beyond its share a client's own requests are refused, not other clients'
+    for n in range(2):
+        client.post('/generate-audio', json={'text': f'Filler {n}. ' * 20, 'voice': 'en'},
+                    environ_base={'REMOTE_ADDR': '10.0.0.2'})
+    response = client.post('/generate-audio', json={'text': 'One too many. ' * 20, 'voice': 'en'},
+                           environ_base={'REMOTE_ADDR': '10.0.0.2'})
+    assert response.status_code == 429
+
+    backend.gate.set()
+    assert wait_for_job(other)['status'] == 'completed'
+    for doc in batch['documents']:
+        assert wait_for_job(doc['audio_id'], timeout=30)['status'] == 'completed'
+    assert client.get(f"/batch/{batch['batch_id']}").get_json()['status'] == 'completed'
+    assert app.scheduler.stats()['deferred'] == 0
+
+
+def test_deferred_jobs_keep_their_order():
+    scheduler = app.JobScheduler(workers=1, max_queue=10, max_per_client=2)
+    ran = []
+    gate = threading.Event()
+    done = threading.Event()
+
+    def job(n):
+        async def run():
+            while not gate.is_set():
+                await asyncio.sleep(0.01)
+            ran.append(n)
+            if n == 4:
+                done.set()
+        return run
+
+    for n in range(5):
+        scheduler.submit(f'job-{n}', job(n), client_id='batch', defer=True)
+    stats = scheduler.stats()
+    assert stats['queued'] + stats['active'] + stats['deferred'] == 5
+    assert stats['queued'] <= 2
+    assert all(scheduler.holds(f'job-{n}') for n in range(5))
+    gate.set()
+    assert done.wait(5)
+    assert ran == [0, 1, 2, 3, 4]
@@ -0,0 +1,51 @@
+"""Extracted text is written to the text cache page by page while a conversion runs."""
+import os
+
+import app
+from conftest import FailingBackend, wait_for_job
+from corpus import generate_pdf
+
+
+def convert(pdf_path, **form):
+    with open(pdf_path, 'rb') as f:
+        response = app.app.test_client().post('/convert', data={'file': (f, 'doc.pdf'), **form},
+                                              content_type='multipart/form-data')
+    assert response.status_code == 200, response.get_json()
+    return wait_for_job(response.get_json()['audio_id'])
+
+
+def text_key(pdf_path):
+    with open(pdf_path, 'rb') as f:
+        digest = app.hashlib.sha256(f.read()).hexdigest()
+    return f"{digest}-v{app.EXTRACTION_VERSION}"
+
+
+def test_conversion_caches_the_pages(workdir, monkeypatch):
+    monkeypatch.setattr(app, 'tts_backends', [app.FakeTTSBackend(4, latency=0)])
+    pdf_path = str(workdir / 'doc.pdf')
+    generate_pdf(pdf_path, 5, seed=2, lines_per_page=5)
+
+    assert convert(pdf_path)['status'] == 'completed'
+    pages = app.load_cached_pages(text_key(pdf_path))
+    assert pages == list(app.iter_pdf_pages(pdf_path, parallel=False))
+    assert not [name for name in os.listdir(app.text_cache.directory) if name.endswith('.tmp')]
+
+
+def test_sectioned_conversion_caches_the_pages(workdir, monkeypatch):
+    monkeypatch.setattr(app, 'tts_backends', [app.FakeTTSBackend(4, latency=0)])
+    monkeypatch.setitem(app.app.config, 'SECTION_PAGES', 2)
+    pdf_path = str(workdir / 'doc.pdf')
+    generate_pdf(pdf_path, 5, seed=3, lines_per_page=5)
+
+    assert convert(pdf_path, sections='1')['status'] == 'completed'
+    assert app.load_cached_pages(text_key(pdf_path)) == list(app.iter_pdf_pages(pdf_path, parallel=False))
+
+
+def test_failed_conversion_leaves_no_cache_entry(workdir, monkeypatch):
+    monkeypatch.setattr(app, 'tts_backends', [FailingBackend()])
+    pdf_path = str(workdir / 'doc.pdf')
+    generate_pdf(pdf_path, 3, seed=4, lines_per_page=5)
+
+    assert convert(pdf_path)['status'] == 'failed'
+    assert app.load_cached_pages(text_key(pdf_path)) is None
+    assert os.listdir(app.text_cache.directory) == []